@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+
+from . import db, instrumentation
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        connection_created.connect(instrumentation.install)
+        connection_created.connect(db.configure_sqlite)
+        request_started.connect(db.check_connections)
@@ -0,0 +1,214 @@
+"""Двухуровневый кэш: локальный LRU процесса перед общим бэкендом.
+
+L1 — небольшой словарь в памяти процесса, L2 — общий для всех
+воркеров кэш (Redis, memcached, файловый), заданный отдельным алиасом
+в settings.CACHES. Значения, записанные через set(), хранятся в L2
+вместе со штампом записи, а штамп дублируется под отдельным ключом.
+Запись L1 живёт не дольше L1_TIMEOUT секунд, после чего сверяется со
+штампом в L2: совпал — продлевается, иначе перечитывается. Значения из
+add() и счётчики incr() хранятся в L2 как есть и в L1 не попадают,
+поэтому блокировки и номера версий всегда согласованы между процессами.
+Так же, минуя L1, хранятся ключи с префиксами из L2_ONLY_PREFIXES —
+записи, которые после изменения в одном процессе не должны читаться
+в других даже L1_TIMEOUT секунд.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, namedtuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .. import instrumentation
+
+Entry = namedtuple('Entry', ('stamp', 'value'))
+
+STAMP_SUFFIX = ':stamp'
+
+
+class TieredCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', location or 'shared')
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1_timeout = options.get('L1_TIMEOUT', 5)
+        self._l2_only_prefixes = tuple(options.get('L2_ONLY_PREFIXES', ()))
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _l2_key(self, key, version):
+        return self.make_key(key, version)
+
+    def _in_l1(self, key):
+        return not key.startswith(self._l2_only_prefixes)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+        instrumentation.count_cache(name)
+
+    def _l1_get(self, key):
+        """Возвращает (запись, нужна_ли_сверка_со_штампом) или None."""
+        with self._lock:
+            item = self._l1.get(key)
+            if item is None:
+                return None
+            self._l1.move_to_end(key)
+        stamp, data, checked_at, expires_at = item
+        now = time.monotonic()
+        if expires_at is not None and now >= expires_at:
+            self._l1_drop(key)
+            return None
+        return item, now - checked_at >= self._l1_timeout
+
+    def _l1_set(self, key, entry, timeout):
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        item = (
+            entry.stamp,
+            pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL),
+            time.monotonic(),
+            expires_at,
+        )
+        with self._lock:
+            self._l1[key] = item
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_touch(self, key, item):
+        with self._lock:
+            if key in self._l1:
+                self._l1[key] = (item[0], item[1], time.monotonic(), item[3])
+
+    def _l1_drop(self, key):
+        with self._lock:
+            self._l1.pop(key, None)
+
+    def _backend_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = {}
+        stale = {}
+        for key in keys:
+            l2_key = self._l2_key(key, version)
+            if not self._in_l1(key):
+                missing[l2_key] = key
+                continue
+            cached = self._l1_get(l2_key)
+            if cached is None:
+                self._count('l1_misses')
+                missing[l2_key] = key
+            elif cached[1]:
+                stale[l2_key] = (key, cached[0])
+            else:
+                self._count('l1_hits')
+                found[key] = pickle.loads(cached[0][1])
+        if stale:
+            found.update(self._revalidate(stale, missing))
+        if missing:
+            found.update(self._read_l2(missing))
+        return found
+
+    def _revalidate(self, stale, missing):
+        """Сверяет устаревшие записи L1 со штампами в L2."""
+        found = {}
+        stamps = self.l2.get_many([key + STAMP_SUFFIX for key in stale])
+        for l2_key, (key, item) in stale.items():
+            if stamps.get(l2_key + STAMP_SUFFIX) == item[0]:
+                self._count('l1_hits')
+                self._l1_touch(l2_key, item)
+                found[key] = pickle.loads(item[1])
+            else:
+                self._count('l1_misses')
+                self._l1_drop(l2_key)
+                missing[l2_key] = key
+        return found
+
+    def _read_l2(self, missing):
+        found = {}
+        values = self.l2.get_many(list(missing))
+        for l2_key, key in missing.items():
+            if l2_key not in values:
+                self._count('l2_misses')
+                continue
+            self._count('l2_hits')
+            value = values[l2_key]
+            if isinstance(value, Entry):
+                # Оставшийся срок записи в L2 неизвестен, но штамп
+                # истекает вместе с ней, и сверка его обнаружит.
+                self._l1_set(l2_key, value, None)
+                value = value.value
+            found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._backend_timeout(timeout)
+        payload = {}
+        for key, value in data.items():
+            l2_key = self._l2_key(key, version)
+            if not self._in_l1(key):
+                payload[l2_key] = value
+                continue
+            entry = Entry(uuid.uuid4().hex, value)
+            payload[l2_key] = entry
+            payload[l2_key + STAMP_SUFFIX] = entry.stamp
+            self._l1_set(l2_key, entry, timeout)
+        return self.l2.set_many(payload, timeout=timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l2_key = self._l2_key(key, version)
+        self._l1_drop(l2_key)
+        return self.l2.add(l2_key, value, self._backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        l2_key = self._l2_key(key, version)
+        timeout = self._backend_timeout(timeout)
+        self.l2.touch(l2_key + STAMP_SUFFIX, timeout)
+        return self.l2.touch(l2_key, timeout)
+
+    def delete(self, key, version=None):
+        l2_key = self._l2_key(key, version)
+        self._l1_drop(l2_key)
+        self.l2.delete(l2_key + STAMP_SUFFIX)
+        return self.l2.delete(l2_key)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        l2_key = self._l2_key(key, version)
+        self._l1_drop(l2_key)
+        return self.l2.incr(l2_key, delta)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
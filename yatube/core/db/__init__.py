@@ -0,0 +1,31 @@
+"""Настройка соединений с базой данных.
+
+configure_sqlite выполняет settings.SQLITE_PRAGMAS для каждого нового
+соединения SQLite: WAL позволяет читать во время записи, а busy_timeout
+ждёт блокировку вместо ошибки «database is locked».
+
+check_connections повторяет CONN_HEALTH_CHECKS из Django 4.1: перед
+запросом постоянное соединение проверяется, и оборвавшееся
+закрывается, чтобы Django открыл новое, а не уронил запрос.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections(**kwargs):
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and connection.connection is not None
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
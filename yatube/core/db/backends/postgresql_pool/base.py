@@ -0,0 +1,91 @@
+"""PostgreSQL через пул соединений psycopg2 внутри процесса.
+
+Закрытие соединения в Django возвращает его в пул, поэтому при
+CONN_MAX_AGE = 0 запрос не платит за подключение к базе. Размер пула
+задаёт DATABASES[...]['POOL'] = {'MIN_SIZE': 1, 'MAX_SIZE': 10,
+'TIMEOUT': 10}. Когда все MAX_SIZE соединений заняты, поток ждёт
+освободившееся до TIMEOUT секунд и только потом получает
+OperationalError: под ASGI параллельные запросы представления берут по
+соединению в потоках sync_to_async, и короткий всплеск не должен
+превращаться в ошибки 500. Пул создаётся заново в каждом процессе,
+поэтому соединения не делятся между воркерами после fork.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import OperationalError, extras, pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool, который ждёт свободное соединение."""
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                f'Нет свободного соединения в пуле за {self.timeout} с'
+            )
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        # Место освобождается, даже если пул уже закрыт: иначе оно
+        # пропало бы навсегда и пул в итоге перестал бы выдавать
+        # соединения.
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self, conn_params):
+        key = (os.getpid(), self.alias)
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict.get('POOL', {})
+                _pools[key] = BlockingConnectionPool(
+                    options.get('MIN_SIZE', 1),
+                    options.get('MAX_SIZE', 10),
+                    options.get('TIMEOUT', 10),
+                    **conn_params
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn()
+        # Соединение из пула приводится к состоянию нового: Django сам
+        # включит autocommit после настройки уровня изоляции.
+        connection.autocommit = False
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Пул сам откатывает незавершённую транзакцию и закрывает
+        # соединение в неизвестном состоянии.
+        with self.wrap_database_errors:
+            self.get_pool(self.get_connection_params()).putconn(
+                self.connection, close=self.connection.closed != 0
+            )
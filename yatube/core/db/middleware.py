@@ -0,0 +1,52 @@
+"""Middleware маршрутизации чтений (см. core/db/routers.py).
+
+Cookie PIN_COOKIE живёт DATABASE_REPLICA_PIN секунд после последнего
+запроса с записью; пока она есть, чтения пользователя идут в default.
+"""
+import asyncio
+
+from django.conf import settings
+
+from . import routers
+
+PIN_COOKIE = 'db_primary'
+
+
+class PrimaryAfterWriteMiddleware:
+    """Работает и под WSGI, и под ASGI без перехода между потоками."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state, token = routers.start(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.stop(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = routers.start(PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.stop(token)
+        return self.finish(state, response)
+
+    def finish(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_REPLICA_PIN,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
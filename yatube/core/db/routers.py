@@ -0,0 +1,162 @@
+"""Чтение лент с реплик.
+
+ReplicaRouter отправляет на реплики только чтения внутри представлений,
+помеченных replica_reads; всё остальное, в том числе любая запись,
+идёт в default. Реплика выбирается по кругу одна на запрос, чтобы
+страница не собиралась из копий с разным отставанием. Реплика, которая
+отстаёт больше DATABASE_REPLICA_MAX_LAG секунд или не отвечает,
+пропускается; если подходящих нет, читается default.
+
+Пользователь должен сразу видеть то, что записал, поэтому после запроса
+с записью PrimaryAfterWriteMiddleware ставит cookie, и следующие
+DATABASE_REPLICA_PIN секунд его чтения идут в default.
+"""
+import asyncio
+import itertools
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+# Отставание реплики проверяется не чаще раза в столько секунд.
+LAG_CHECK_INTERVAL = 5
+
+# Сессии читаются только из default: на отстающей реплике пользователь
+# оставался бы вошедшим после выхода.
+PRIMARY_APPS = ('sessions',)
+
+LAG_QUERIES = {
+    'postgresql': (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = '
+        'pg_last_wal_replay_lsn() THEN 0 ELSE EXTRACT(EPOCH FROM '
+        'now() - pg_last_xact_replay_timestamp()) END'
+    ),
+    # Копия файла SQLite не отстаёт сама по себе; запрос проверяет, что
+    # в ней есть схема, а не пустой файл, который создал бы sqlite3.
+    'sqlite': 'SELECT 0 FROM django_migrations LIMIT 1',
+}
+
+_state = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    """Маршрутизация чтений одного запроса."""
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.use_replicas = False
+        self.alias = None
+
+
+def start(pinned):
+    state = RoutingState(pinned)
+    return state, _state.set(state)
+
+
+def stop(token):
+    _state.reset(token)
+
+
+def replica_reads(view):
+    """Разрешает представлению читать с реплик."""
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            state = _state.get()
+            if state is None:
+                return await view(request, *args, **kwargs)
+            state.use_replicas = True
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                state.use_replicas = False
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        state.use_replicas = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.use_replicas = False
+    return wrapper
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах или None, если она недоступна."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_QUERIES.get(connection.vendor, 'SELECT 0'))
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    return float(row[0])
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.counter = itertools.count()
+        self.lags = {}
+
+    def lag(self, alias):
+        now = time.monotonic()
+        checked, lag = self.lags.get(alias, (None, None))
+        if checked is None or now - checked >= LAG_CHECK_INTERVAL:
+            lag = replica_lag(alias)
+            self.lags[alias] = (now, lag)
+        return lag
+
+    def available(self):
+        """Реплики, которые отвечают и отстают не больше допустимого."""
+        replicas = []
+        for alias in settings.DATABASE_REPLICAS:
+            lag = self.lag(alias)
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG:
+                replicas.append(alias)
+        return replicas
+
+    def choose(self):
+        replicas = self.available()
+        if not replicas:
+            return 'default'
+        return replicas[next(self.counter) % len(replicas)]
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or not state.use_replicas
+            or state.pinned
+            or state.wrote
+            or model._meta.app_label in PRIMARY_APPS
+        ):
+            return 'default'
+        if state.alias is None:
+            state.alias = self.choose()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
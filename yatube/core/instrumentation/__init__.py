@@ -0,0 +1,112 @@
+"""Замеры одного запроса: SQL, кэш и рендер шаблонов.
+
+Сборщик текущего запроса хранится в ContextVar, поэтому код, который
+ничего не знает о middleware (кэш, бэкенд шаблонов, соединения с
+базой), отчитывается через функции этого модуля. Вне замеряемого
+запроса они ничего не делают. Контекст копируется в потоки
+sync_to_async, так что асинхронные представления, выполняющие запросы
+к базе в других потоках, замеряются так же.
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_collector = ContextVar('instrumentation_collector', default=None)
+
+CACHE_HITS = ('l1_hits', 'l2_hits')
+CACHE_MISSES = ('l2_misses',)
+
+
+class Collector:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.queries = {}
+        self.cache = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def add_query(self, sql, duration):
+        with self.lock:
+            self.query_count += 1
+            self.query_time += duration
+            count, total = self.queries.get(sql, (0, 0.0))
+            self.queries[sql] = (count + 1, total + duration)
+
+    @property
+    def cache_hits(self):
+        return sum(self.cache[name] for name in CACHE_HITS)
+
+    @property
+    def cache_misses(self):
+        return sum(self.cache[name] for name in CACHE_MISSES)
+
+    def top_queries(self, limit):
+        """Самые долгие запросы; одинаковый SQL суммируется."""
+        queries = sorted(
+            self.queries.items(), key=lambda item: item[1][1], reverse=True
+        )
+        return [
+            {'sql': sql, 'count': count, 'ms': round(total * 1000, 2)}
+            for sql, (count, total) in queries[:limit]
+        ]
+
+
+def start():
+    collector = Collector()
+    return collector, _collector.set(collector)
+
+
+def stop(token):
+    _collector.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper, который стоит на всех соединениях с базой."""
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.add_query(sql, time.perf_counter() - started)
+
+
+def install(connection, **kwargs):
+    """Обработчик connection_created: ставит record_query на соединение.
+
+    Обёртки хранятся в объекте соединения потока и переживают
+    переподключение, поэтому повторно не добавляются.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def count_cache(name):
+    collector = _collector.get()
+    if collector is not None:
+        collector.cache[name] += 1
+
+
+@contextmanager
+def render_timer():
+    """Время рендера шаблона. Вложенные рендеры не суммируются: их время
+    уже входит во внешний."""
+    collector = _collector.get()
+    if collector is None:
+        yield
+        return
+    collector.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.template_depth -= 1
+        if not collector.template_depth:
+            collector.template_time += time.perf_counter() - started
@@ -0,0 +1,113 @@
+"""Middleware замеров: заголовок Server-Timing и журнал медленных запросов.
+
+Общее время меряется у каждого запроса. SQL, кэш и шаблоны — только у
+доли INSTRUMENTATION_SAMPLE_RATE запросов: обёртка вокруг каждого
+SQL-запроса стоит дороже, чем хочется платить на всех запросах под
+нагрузкой. Запрос дольше INSTRUMENTATION_SLOW_REQUEST_MS пишется в
+журнал yatube.slow_requests одной строкой JSON, а если он попал в
+выборку — вместе с самыми долгими SQL-запросами. Время ответа и число
+SQL-запросов также попадают в метрики Prometheus (см. core/metrics.py).
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from .. import metrics
+from . import start, stop
+
+logger = logging.getLogger('yatube.slow_requests')
+
+
+def server_timing(total, collector):
+    timings = [f'total;dur={total:.1f}']
+    if collector is not None:
+        timings += [
+            f'db;dur={collector.query_time * 1000:.1f};'
+            f'desc="{collector.query_count} queries"',
+            f'cache;desc="{collector.cache_hits} hits '
+            f'{collector.cache_misses} misses"',
+            f'tpl;dur={collector.template_time * 1000:.1f}',
+        ]
+    return ', '.join(timings)
+
+
+def log_record(request, response, total, collector):
+    match = request.resolver_match
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'ms': round(total, 1),
+        'sampled': collector is not None,
+    }
+    if collector is not None:
+        record.update({
+            'queries': collector.query_count,
+            'db_ms': round(collector.query_time * 1000, 1),
+            'cache_hits': collector.cache_hits,
+            'cache_misses': collector.cache_misses,
+            'template_ms': round(collector.template_time * 1000, 1),
+            'top_queries': collector.top_queries(
+                settings.INSTRUMENTATION_TOP_QUERIES
+            ),
+        })
+    return record
+
+
+class InstrumentationMiddleware:
+    """Работает и под WSGI, и под ASGI без перехода между потоками."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        collector, token = self.start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(token)
+        return self.finish(request, response, started, collector)
+
+    async def __acall__(self, request):
+        collector, token = self.start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(token)
+        return self.finish(request, response, started, collector)
+
+    def start(self):
+        if random.random() < settings.INSTRUMENTATION_SAMPLE_RATE:
+            return start()
+        return None, None
+
+    def stop(self, token):
+        if token is not None:
+            stop(token)
+
+    def finish(self, request, response, started, collector):
+        seconds = time.perf_counter() - started
+        metrics.observe_request(request, response, seconds, collector)
+        total = seconds * 1000
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(total, collector)
+        if total >= settings.INSTRUMENTATION_SLOW_REQUEST_MS:
+            record = log_record(request, response, total, collector)
+            logger.warning(
+                json.dumps(record, ensure_ascii=False),
+                extra={'request_data': record},
+            )
+        return response
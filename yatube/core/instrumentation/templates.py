@@ -0,0 +1,25 @@
+"""Бэкенд шаблонов Django, замеряющий время рендера."""
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import render_timer
+
+
+class InstrumentedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with render_timer():
+            return super().render(context, request)
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """DjangoTemplates, чьи шаблоны отчитываются о времени рендера."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(
+            super().get_template(template_name).template, self
+        )
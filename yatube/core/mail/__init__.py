@@ -0,0 +1,10 @@
+"""Очередь исходящей почты.
+
+EMAIL_BACKEND = 'core.mail.queue.QueueBackend' не отправляет письма, а
+сохраняет их в таблицу QueuedMail, поэтому запрос (например, сброс
+пароля) делает одну вставку вместо разговора с почтовым сервером.
+Команда send_queued_mail забирает письма пачками и отправляет каждую
+пачку через одно соединение настоящего бэкенда MAIL_QUEUE_BACKEND.
+Неотправленное письмо повторяется с растущей паузой, пока не кончатся
+попытки.
+"""
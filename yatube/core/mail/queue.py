@@ -0,0 +1,97 @@
+import datetime
+import pickle
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import QueuedMail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_DELAY = datetime.timedelta(minutes=1)
+
+
+def dump(message):
+    # Соединение бэкенда очереди не сериализуется и при отправке не
+    # нужно: письмо уйдёт через соединение воркера.
+    message.connection = None
+    return pickle.dumps(message)
+
+
+class QueueBackend(BaseEmailBackend):
+    """Ставит письма в очередь в текущей транзакции."""
+
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        queued = QueuedMail.objects.bulk_create([
+            QueuedMail(
+                message=dump(message),
+                subject=message.subject[:255],
+                recipients=', '.join(message.recipients()),
+                send_after=now,
+            )
+            for message in email_messages
+            if message.recipients()
+        ])
+        return len(queued)
+
+
+def fail(mail, error):
+    """Откладывает письмо: пауза удваивается с каждой попыткой."""
+    attempts = mail.attempts + 1
+    QueuedMail.objects.filter(pk=mail.pk).update(
+        status=(
+            QueuedMail.FAILED
+            if attempts >= MAX_ATTEMPTS
+            else QueuedMail.PENDING
+        ),
+        attempts=F('attempts') + 1,
+        error=repr(error),
+        send_after=timezone.now() + RETRY_DELAY * 2 ** (attempts - 1),
+    )
+
+
+def send(mails, connection):
+    sent = []
+    for mail in mails:
+        try:
+            connection.send_messages([pickle.loads(mail.message)])
+        except Exception as error:
+            fail(mail, error)
+        else:
+            sent.append(mail.pk)
+    return sent
+
+
+def send_batch(batch_size=BATCH_SIZE):
+    """Отправляет пачку писем, которым подошёл срок.
+
+    Возвращает (взято, отправлено). Если соединение не открылось,
+    откладывается вся пачка. На PostgreSQL параллельные воркеры
+    пропускают письма, заблокированные соседом.
+    """
+    with transaction.atomic():
+        mails = list(QueuedMail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=QueuedMail.PENDING, send_after__lte=timezone.now()
+        ).order_by('pk')[:batch_size])
+        if not mails:
+            return 0, 0
+        connection = get_connection(settings.MAIL_QUEUE_BACKEND)
+        try:
+            connection.open()
+        except Exception as error:
+            for mail in mails:
+                fail(mail, error)
+            return len(mails), 0
+        try:
+            sent = send(mails, connection)
+        finally:
+            connection.close()
+        QueuedMail.objects.filter(pk__in=sent).delete()
+    return len(mails), len(sent)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import queue
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками через одно соединение.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=queue.BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые письма.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах между проверками очереди с --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            taken, sent = queue.send_batch(options['batch_size'])
+            if taken:
+                self.stdout.write(f'{sent}/{taken} писем отправлено')
+            if not options['loop']:
+                break
+            if taken < options['batch_size']:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,84 @@
+"""Метрики приложения в формате Prometheus.
+
+Под gunicorn у каждого воркера свои счётчики. Если задана переменная
+окружения PROMETHEUS_MULTIPROC_DIR, prometheus_client пишет значения в
+файлы этого каталога, а /metrics складывает файлы всех процессов, так
+что любой воркер отдаёт сумму по всем. Каталог должен быть общим для
+воркеров и очищаться перед запуском сервера.
+
+Метрики раскрывают адреса и нагрузку, поэтому /metrics отвечает только
+адресам из METRICS_ALLOWED_IPS и запросам с токеном METRICS_TOKEN.
+"""
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+OTHER_VIEW = 'other'
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds',
+    'Время ответа по имени URL.',
+    ['view', 'method'],
+)
+REQUESTS = Counter(
+    'yatube_requests',
+    'Ответы по имени URL и статусу.',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'yatube_request_db_queries',
+    'SQL-запросов на запрос; считается на выборке запросов.',
+    ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, float('inf')),
+)
+
+
+def view_label(request):
+    """Имя URL из пространств METRICS_VIEW_NAMESPACES, иначе 'other':
+    число меток должно оставаться небольшим."""
+    match = request.resolver_match
+    if match is None or match.namespace not in (
+        settings.METRICS_VIEW_NAMESPACES
+    ):
+        return OTHER_VIEW
+    return match.view_name
+
+
+def observe_request(request, response, seconds, collector=None):
+    view = view_label(request)
+    REQUEST_DURATION.labels(view, request.method).observe(seconds)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    if collector is not None:
+        REQUEST_QUERIES.labels(view).observe(collector.query_count)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def is_allowed(request):
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(settings.METRICS_TOKEN) and constant_time_compare(
+        token, f'Bearer {settings.METRICS_TOKEN}'
+    )
+
+
+@require_safe
+def metrics(request):
+    if not is_allowed(request):
+        raise Http404
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class QueuedMail(models.Model):
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (FAILED, 'Ошибка'),
+    )
+
+    message = models.BinaryField('Письмо')
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после')
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Письма в очереди'
+        indexes = (
+            models.Index(
+                fields=('status', 'send_after'),
+                name='queuedmail_status_send_idx'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.recipients}: {self.subject}'
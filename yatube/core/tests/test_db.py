@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase
+from psycopg2 import OperationalError
+from psycopg2.pool import PoolError
+
+from .. import db
+from ..db.backends.postgresql_pool.base import BlockingConnectionPool
+
+
+class SQLitePragmasTest(SimpleTestCase):
+    def test_new_connection_configured(self):
+        """Новое соединение SQLite переводится в WAL"""
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': os.path.join(directory, 'db.sqlite3'),
+            }, alias='pragmas')
+            try:
+                with wrapper.cursor() as cursor:
+                    values = {}
+                    for name in ('journal_mode', 'synchronous',
+                                 'busy_timeout'):
+                        cursor.execute(f'PRAGMA {name}')
+                        values[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        # synchronous=NORMAL — это 1.
+        self.assertEqual(
+            values,
+            {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000},
+        )
+
+
+class HealthCheckTest(TestCase):
+    def fake_connection(self, usable, health_checks=True, connected=True):
+        return mock.Mock(
+            settings_dict={'CONN_HEALTH_CHECKS': health_checks},
+            connection=object() if connected else None,
+            in_atomic_block=False,
+            **{'is_usable.return_value': usable},
+        )
+
+    def test_broken_connection_closed(self):
+        """Перед запросом оборвавшееся соединение закрывается"""
+        broken = self.fake_connection(usable=False)
+        alive = self.fake_connection(usable=True)
+        unchecked = self.fake_connection(usable=False, health_checks=False)
+        idle = self.fake_connection(usable=False, connected=False)
+        with mock.patch('core.db.connections') as connections:
+            connections.all.return_value = [broken, alive, unchecked, idle]
+            db.check_connections()
+        broken.close.assert_called_once()
+        for other in (alive, unchecked, idle):
+            other.close.assert_not_called()
+        idle.is_usable.assert_not_called()
+
+    def test_runs_on_request(self):
+        with mock.patch('core.db.connections') as connections:
+            connections.all.return_value = []
+            self.client.get('/')
+        connections.all.assert_called()
+
+
+@mock.patch('psycopg2.pool.psycopg2.connect', side_effect=mock.Mock)
+class BlockingConnectionPoolTest(SimpleTestCase):
+    def make_pool(self, size):
+        return BlockingConnectionPool(0, size, 0.05)
+
+    def test_waits_then_fails(self, connect):
+        """Пустой пул ждёт TIMEOUT и только потом отказывает"""
+        pool = self.make_pool(1)
+        connection = pool.getconn()
+        with self.assertRaises(OperationalError):
+            pool.getconn()
+        pool.putconn(connection)
+        self.assertIsNotNone(pool.getconn())
+
+    def test_failed_putconn_frees_slot(self, connect):
+        pool = self.make_pool(1)
+        connection = pool.getconn()
+        pool.closeall()
+        with self.assertRaises(PoolError):
+            pool.putconn(connection)
+        self.assertTrue(pool._slots.acquire(timeout=0))
@@ -0,0 +1,128 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import instrumentation
+from ..instrumentation.middleware import server_timing
+
+
+def metrics(response):
+    return {
+        metric.split(';')[0]: metric
+        for metric in response['Server-Timing'].split(', ')
+    }
+
+
+def cache_counts(response):
+    hits, misses = re.search(
+        r'(\d+) hits (\d+) misses', metrics(response)['cache']
+    ).groups()
+    return int(hits), int(misses)
+
+
+@override_settings(
+    INSTRUMENTATION_SAMPLE_RATE=1,
+    INSTRUMENTATION_SERVER_TIMING=True,
+    INSTRUMENTATION_SLOW_REQUEST_MS=60000,
+)
+class InstrumentationMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing(self):
+        """Server-Timing содержит время, SQL, кэш и шаблоны"""
+        response = self.client.get(reverse('posts:index'))
+        timing = metrics(response)
+        self.assertEqual(set(timing), {'total', 'db', 'cache', 'tpl'})
+        self.assertRegex(timing['db'], r'desc="[1-9]\d* queries"')
+        self.assertRegex(timing['cache'], r'[1-9]\d* misses')
+        self.assertNotEqual(timing['tpl'], 'tpl;dur=0.0')
+
+    def test_cache_hits(self):
+        """Попадания в кэш считаются для каждого запроса отдельно"""
+        first = cache_counts(self.client.get(reverse('posts:index')))
+        second = cache_counts(self.client.get(reverse('posts:index')))
+        self.assertGreater(second[0], 0)
+        self.assertLess(second[1], first[1])
+        self.assertLess(sum(second), sum(first))
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Вне выборки отдаётся только общее время"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(set(metrics(response)), {'total'})
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=0)
+    def test_slow_request_log(self):
+        """Медленный запрос пишется в журнал с самыми долгими SQL"""
+        with self.assertLogs('yatube.slow_requests') as logs:
+            self.client.get(reverse('posts:profile', args=['author']))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['sampled'])
+        self.assertGreater(record['queries'], 0)
+        self.assertLessEqual(len(record['top_queries']), 5)
+        self.assertEqual(
+            set(record['top_queries'][0]), {'sql', 'count', 'ms'}
+        )
+        self.assertEqual(logs.records[0].request_data, record)
+
+    @override_settings(
+        INSTRUMENTATION_SLOW_REQUEST_MS=0, INSTRUMENTATION_SAMPLE_RATE=0
+    )
+    def test_slow_request_log_not_sampled(self):
+        with self.assertLogs('yatube.slow_requests') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertFalse(record['sampled'])
+        self.assertNotIn('queries', record)
+
+    def test_fast_request_not_logged(self):
+        with self.assertNoLogs('yatube.slow_requests'):
+            self.client.get(reverse('posts:index'))
+
+
+class CollectorTest(TestCase):
+    def test_top_queries_grouped(self):
+        """Одинаковый SQL суммируется, список упорядочен по времени"""
+        collector = instrumentation.Collector()
+        collector.queries = {'fast': (3, 0.003), 'slow': (1, 0.01)}
+        self.assertEqual(collector.top_queries(1), [
+            {'sql': 'slow', 'count': 1, 'ms': 10.0},
+        ])
+
+    def test_nested_templates_counted_once(self):
+        collector, token = instrumentation.start()
+        try:
+            with instrumentation.render_timer():
+                render_to_string('includes/header.html')
+                outer = collector.template_time
+            self.assertEqual(outer, 0)
+        finally:
+            instrumentation.stop(token)
+        self.assertGreater(collector.template_time, 0)
+
+    def test_no_collector(self):
+        """Вне замеряемого запроса отчёты ничего не делают"""
+        instrumentation.count_cache('l1_hits')
+        with instrumentation.render_timer():
+            pass
+        self.assertEqual(server_timing(1.5, None), 'total;dur=1.5')
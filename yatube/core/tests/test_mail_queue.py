@@ -0,0 +1,97 @@
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import get_connection, send_mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+
+from ..mail import queue
+from ..models import QueuedMail
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.queue.QueueBackend',
+    MAIL_QUEUE_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class MailQueueTest(TestCase):
+    def send(self, count=1):
+        for i in range(count):
+            send_mail(f'Тема {i}', 'Текст', None, [f'user{i}@yatube.test'])
+
+    def test_password_reset_queued(self):
+        """Сброс пароля только ставит письмо в очередь"""
+        User.objects.create_user(
+            username='user', email='user@yatube.test', password='secret'
+        )
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'user@yatube.test'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            QueuedMail.objects.get().recipients, 'user@yatube.test'
+        )
+        self.assertEqual(queue.send_batch(), (1, 1))
+        self.assertEqual(mail.outbox[0].to, ['user@yatube.test'])
+        self.assertFalse(QueuedMail.objects.exists())
+
+    def test_batch_uses_one_connection(self):
+        """Пачка уходит через одно соединение"""
+        self.send(3)
+        with mock.patch(
+            'core.mail.queue.get_connection', wraps=get_connection
+        ) as connect:
+            self.assertEqual(queue.send_batch(batch_size=2), (2, 2))
+        connect.assert_called_once()
+        self.assertEqual(
+            [message.subject for message in mail.outbox], ['Тема 0', 'Тема 1']
+        )
+        self.assertEqual(QueuedMail.objects.count(), 1)
+
+    def test_failed_mail_retried_later(self):
+        """Неотправленное письмо откладывается, пауза растёт"""
+        self.send()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=OSError('сервер недоступен'),
+        ):
+            self.assertEqual(queue.send_batch(), (1, 0))
+            self.assertEqual(queue.send_batch(), (0, 0))
+            first = QueuedMail.objects.get()
+            QueuedMail.objects.update(send_after=timezone.now())
+            queue.send_batch()
+        second = QueuedMail.objects.get()
+        self.assertEqual(second.attempts, 2)
+        self.assertIn('сервер недоступен', second.error)
+        self.assertGreater(
+            second.send_after - timezone.now(),
+            first.send_after - first.created,
+        )
+        QueuedMail.objects.update(send_after=timezone.now())
+        self.assertEqual(queue.send_batch(), (1, 1))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_gives_up(self):
+        self.send()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=OSError,
+        ):
+            for _ in range(queue.MAX_ATTEMPTS):
+                QueuedMail.objects.update(send_after=timezone.now())
+                queue.send_batch()
+        self.assertEqual(QueuedMail.objects.get().status, QueuedMail.FAILED)
+        QueuedMail.objects.update(send_after=timezone.now())
+        self.assertEqual(queue.send_batch(), (0, 0))
+
+    def test_command(self):
+        self.send(2)
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('2/2', out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
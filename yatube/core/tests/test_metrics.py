@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from posts.models import Post, User
+
+from ..metrics import get_registry
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoint(self):
+        """/metrics отдаёт метрики в текстовом формате Prometheus"""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        for name in (
+            'yatube_request_duration_seconds_bucket',
+            'yatube_requests_total',
+            'yatube_request_db_queries_bucket',
+            'yatube_page_cache_requests_total',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(name, response.content.decode())
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'], METRICS_TOKEN='')
+    def test_endpoint_closed(self):
+        """Чужим адресам /metrics не отдаётся"""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN='secret')
+    def test_endpoint_token(self):
+        for header, status in (
+            ('Bearer secret', 200),
+            ('Bearer wrong', 404),
+            ('', 404),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    reverse('metrics'), HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(response.status_code, status)
+
+    def test_requests_by_view(self):
+        """Запросы считаются по имени URL, чужие URL — в метке other"""
+        labels = {'view': 'posts:profile', 'method': 'GET'}
+        before = sample('yatube_requests_total', status='200', **labels)
+        queries = sample(
+            'yatube_request_db_queries_count', view='posts:profile'
+        )
+        self.client.get(reverse('posts:profile', args=['author']))
+        self.assertEqual(
+            sample('yatube_requests_total', status='200', **labels),
+            before + 1,
+        )
+        self.assertEqual(
+            sample('yatube_request_db_queries_count', view='posts:profile'),
+            queries + 1,
+        )
+        other = sample(
+            'yatube_requests_total', view='other', method='GET', status='404'
+        )
+        self.client.get('/missing/page/')
+        self.assertEqual(sample(
+            'yatube_requests_total', view='other', method='GET', status='404'
+        ), other + 1)
+
+    def test_page_cache(self):
+        """Промахи и попадания в кэш главной считаются отдельно"""
+        miss = sample(
+            'yatube_page_cache_requests_total', page='index', result='miss'
+        )
+        hit = sample(
+            'yatube_page_cache_requests_total', page='index', result='hit'
+        )
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(sample(
+            'yatube_page_cache_requests_total', page='index', result='miss'
+        ), miss + 1)
+        self.assertEqual(sample(
+            'yatube_page_cache_requests_total', page='index', result='hit'
+        ), hit + 1)
+
+
+class MultiProcessTest(TestCase):
+    def test_aggregates_processes(self):
+        """Значения воркеров складываются через общий каталог"""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory}
+            for _ in range(2):
+                subprocess.run([
+                    sys.executable, '-c',
+                    'from prometheus_client import Counter; '
+                    "Counter('yatube_worker', 'Тест.').inc(2)",
+                ], env=env, check=True)
+            with mock.patch.dict(
+                os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}
+            ):
+                registry = get_registry()
+            self.assertEqual(
+                registry.get_sample_value('yatube_worker_total'), 4
+            )
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..db import routers
+from ..db.middleware import PIN_COOKIE
+
+
+@contextmanager
+def routing(pinned=False, use_replicas=True):
+    state, token = routers.start(pinned)
+    state.use_replicas = use_replicas
+    try:
+        yield state
+    finally:
+        routers.stop(token)
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1', 'replica2'], DATABASE_REPLICA_MAX_LAG=5
+)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.lags = {'replica1': 0.0, 'replica2': 1.0}
+        patcher = mock.patch(
+            'core.db.routers.replica_lag', side_effect=self.lags.get
+        )
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, **kwargs):
+        with routing(**kwargs):
+            return self.router.db_for_read(Post)
+
+    def test_round_robin(self):
+        """Запросы по очереди читают с разных реплик"""
+        self.assertEqual(
+            [self.read() for _ in range(4)],
+            ['replica1', 'replica2', 'replica1', 'replica2'],
+        )
+
+    def test_one_replica_per_request(self):
+        with routing():
+            aliases = {self.router.db_for_read(Post) for _ in range(3)}
+        self.assertEqual(len(aliases), 1)
+
+    def test_lagging_replica_skipped(self):
+        """Отстающая и недоступная реплики пропускаются"""
+        self.lags.update(replica1=30.0, replica2=None)
+        self.assertEqual(self.read(), 'default')
+        self.router.lags.clear()
+        self.lags.update(replica2=2.0)
+        self.assertEqual({self.read() for _ in range(2)}, {'replica2'})
+
+    def test_lag_checked_periodically(self):
+        for _ in range(3):
+            self.read()
+        self.assertEqual(self.replica_lag.call_count, 2)
+        with mock.patch(
+            'core.db.routers.time.monotonic',
+            return_value=routers.time.monotonic()
+            + routers.LAG_CHECK_INTERVAL,
+        ):
+            self.read()
+        self.assertEqual(self.replica_lag.call_count, 4)
+
+    def test_primary_reads(self):
+        """Вне помеченных представлений и после записи читается default"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.read(use_replicas=False), 'default')
+        self.assertEqual(self.read(pinned=True), 'default')
+        with routing() as state:
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        with routing():
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_replicas_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+class ReplicaLagTest(SimpleTestCase):
+    """Реплика SQLite — второй файл базы"""
+
+    def lag(self, path):
+        alias = 'sqlite_replica'
+        with mock.patch.dict(connections.databases, {alias: {
+            **connections['default'].settings_dict, 'NAME': path,
+        }}):
+            try:
+                return routers.replica_lag(alias)
+            finally:
+                connections[alias].close()
+                del connections[alias]
+
+    def test_sqlite_copy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            self.assertIsNone(self.lag(path))
+            with sqlite3.connect(path) as replica:
+                replica.execute(
+                    'CREATE TABLE django_migrations (id INTEGER)'
+                )
+                replica.execute('INSERT INTO django_migrations VALUES (1)')
+            self.assertEqual(self.lag(path), 0.0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_PIN=15)
+class PrimaryAfterWriteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # В тестах реплики нет, поэтому «реплика» здесь — default.
+        patcher = mock.patch.object(
+            routers.ReplicaRouter, 'choose', return_value='default'
+        )
+        self.choose = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_feeds_read_from_replica(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.choose.reset_mock()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.choose.assert_called_once()
+                self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_after_write(self):
+        """После записи чтения пользователя идут в default"""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый'}
+        )
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 15)
+        self.client.get(reverse('posts:index'))
+        self.choose.assert_not_called()
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_cookie_without_replicas(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый'}
+        )
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,92 @@
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache.tiered import TieredCache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-tests',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.worker = self.make_cache()
+        self.other_worker = self.make_cache()
+
+    def make_cache(self, **options):
+        return TieredCache('', {'OPTIONS': {
+            'L2': 'shared', 'L1_MAX_ENTRIES': 2, 'L1_TIMEOUT': 5, **options,
+        }})
+
+    def test_l1_hit(self):
+        """Повторное чтение обслуживается из L1"""
+        self.worker.set('key', {'value': 1})
+        self.assertEqual(self.worker.get('key'), {'value': 1})
+        self.assertEqual(self.worker.stats['l1_hits'], 1)
+        self.assertEqual(self.other_worker.get('key'), {'value': 1})
+        self.assertEqual(self.other_worker.stats['l2_hits'], 1)
+
+    def test_l1_returns_copies(self):
+        """Изменение прочитанного значения не портит L1"""
+        self.worker.set('key', [1])
+        self.worker.get('key').append(2)
+        self.assertEqual(self.worker.get('key'), [1])
+
+    def test_l1_revalidated_by_stamp(self):
+        """Запись L1 перечитывается, если её переписал другой процесс"""
+        self.worker.set('key', 'old')
+        self.other_worker.set('key', 'new')
+        self.assertEqual(self.worker.get('key'), 'old')
+        later = time.monotonic() + 10
+        with mock.patch('core.cache.tiered.time.monotonic',
+                        return_value=later):
+            self.assertEqual(self.worker.get('key'), 'new')
+
+    def test_delete_seen_by_other_worker(self):
+        """Удаление в одном процессе видно в другом после сверки"""
+        self.worker.set('key', 'value')
+        self.other_worker.get('key')
+        self.worker.delete('key')
+        later = time.monotonic() + 10
+        with mock.patch('core.cache.tiered.time.monotonic',
+                        return_value=later):
+            self.assertIsNone(self.other_worker.get('key'))
+
+    def test_lru_bound(self):
+        """L1 хранит не больше L1_MAX_ENTRIES записей"""
+        for key in ('a', 'b', 'c'):
+            self.worker.set(key, key)
+        self.assertEqual(len(self.worker._l1), 2)
+        self.assertEqual(self.worker.get('a'), 'a')
+        self.assertEqual(self.worker.stats['l2_hits'], 1)
+
+    def test_counters_and_locks_bypass_l1(self):
+        """add() и incr() работают напрямую с L2"""
+        self.assertTrue(self.worker.add('counter', 1))
+        self.assertFalse(self.other_worker.add('counter', 1))
+        self.other_worker.incr('counter')
+        self.assertEqual(self.worker.get('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.worker.incr('missing')
+
+    def test_l2_only_prefixes(self):
+        """Ключи из L2_ONLY_PREFIXES сразу видны другим процессам"""
+        worker = self.make_cache(L2_ONLY_PREFIXES=['page:'])
+        other_worker = self.make_cache(L2_ONLY_PREFIXES=['page:'])
+        worker.set('page:index', 'old')
+        self.assertEqual(other_worker.get('page:index'), 'old')
+        other_worker.set('page:index', 'new')
+        self.assertEqual(worker.get('page:index'), 'new')
+        self.assertEqual(worker._l1, {})
+        self.assertEqual(worker.stats['l1_hits'], 0)
@@ -1,22 +1,226 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
 
-from .models import Post, Group, Comment
+from . import moderation, search
+from .constants import ADMIN_EXACT_COUNT_LIMIT
+from .models import Post, Group, Comment, ModerationJob
 
 
-class PostAdmin(admin.ModelAdmin):
+def postgres_estimate(cursor, table):
+    cursor.execute(
+        'SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table]
+    )
+    row = cursor.fetchone()
+    # До первого ANALYZE reltuples равен -1.
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+def sqlite_estimate(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    )
+    if cursor.fetchone():
+        cursor.execute(
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]
+        )
+        row = cursor.fetchone()
+        if row:
+            return int(row[0].split()[0])
+    cursor.execute(f'SELECT MAX(rowid) FROM "{table}"')
+    return cursor.fetchone()[0]
+
+
+ESTIMATES = {
+    'postgresql': postgres_estimate,
+    'sqlite': sqlite_estimate,
+}
+
+
+def estimated_count(model, using='default'):
+    """Число строк таблицы по статистике базы или None.
+
+    PostgreSQL хранит оценку в pg_class.reltuples, SQLite — в
+    sqlite_stat1 после ANALYZE; без статистики SQLite оценивает число
+    строк по наибольшему rowid.
+    """
+    connection = connections[using]
+    estimate = ESTIMATES.get(connection.vendor)
+    if estimate is None:
+        return None
+    with connection.cursor() as cursor:
+        return estimate(cursor, model._meta.db_table)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка: без фильтров большая таблица не пересчитывается.
+
+    Оценка используется, только если она больше ADMIN_EXACT_COUNT_LIMIT,
+    поэтому на небольших таблицах и в отфильтрованных списках число
+    строк точное.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class FastAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class GroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), label='Группа')
+
+
+class SinceForm(forms.Form):
+    since = forms.DateTimeField(
+        label='Начиная с',
+        help_text='Например, 2022-11-20 12:00'
+    )
+
+
+def selected_authors(queryset):
+    return list(
+        queryset.order_by().values_list('author', flat=True).distinct()
+    )
+
+
+class ModerationAdmin(FastAdmin):
+    """Действия, которые выполняет в фоне задача ModerationJob.
+
+    Сначала действие показывает страницу подтверждения с формой
+    параметров, после отправки формы ставит задачу в очередь.
+    """
+
+    def start_job(self, request, name, action, form_class, get_params):
+        form = form_class(request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return TemplateResponse(
+                request,
+                'admin/posts/moderation_action.html',
+                {
+                    **self.admin_site.each_context(request),
+                    'title': dict(ModerationJob.ACTIONS)[action],
+                    'opts': self.model._meta,
+                    'form': form,
+                    'action': name,
+                    'selected': request.POST.getlist(
+                        helpers.ACTION_CHECKBOX_NAME
+                    ),
+                    'select_across': request.POST.get('select_across', 0),
+                    'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                },
+            )
+        job = moderation.enqueue(
+            action, get_params(form.cleaned_data), request.user
+        )
+        self.message_user(
+            request,
+            f'Задача №{job.pk} «{job.get_action_display()}» поставлена '
+            'в очередь',
+            messages.SUCCESS,
+        )
+        return None
+
+
+class PostAdmin(ModerationAdmin):
+    actions = ('delete_authors_posts', 'move_to_group')
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по тексту."""
+        if not search_term.strip():
+            return queryset, False
+        return search.get_backend().filter(queryset, search_term), False
+
+    @admin.action(description='Удалить все посты авторов выбранных постов')
+    def delete_authors_posts(self, request, queryset):
+        return self.start_job(
+            request,
+            'delete_authors_posts',
+            ModerationJob.DELETE_AUTHORS_POSTS,
+            forms.Form,
+            lambda data: {'author_ids': selected_authors(queryset)},
+        )
+
+    @admin.action(description='Перенести выбранные посты в группу')
+    def move_to_group(self, request, queryset):
+        return self.start_job(
+            request,
+            'move_to_group',
+            ModerationJob.MOVE_TO_GROUP,
+            GroupForm,
+            lambda data: {
+                'post_ids': list(queryset.values_list('pk', flat=True)),
+                'group_id': data['group'].pk,
+            },
+        )
+
 
 class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
+    search_fields = ('title', 'slug')
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ModerationAdmin):
+    actions = ('purge_comments',)
     list_display = ('pk', 'post', 'text', 'author',)
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('=author__username',)
+
+    @admin.action(
+        description='Удалить комментарии авторов выбранных комментариев'
+    )
+    def purge_comments(self, request, queryset):
+        return self.start_job(
+            request,
+            'purge_comments',
+            ModerationJob.PURGE_COMMENTS,
+            SinceForm,
+            lambda data: {
+                'author_ids': selected_authors(queryset),
+                'since': data['since'].isoformat(),
+            },
+        )
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'action', 'status', 'progress', 'created_by', 'created',
+    )
+    list_filter = ('status', 'action')
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'action', 'params', 'status', 'total', 'processed', 'error',
+        'created_by', 'created', 'updated',
+    )
+
+    @admin.display(description='Прогресс')
+    def progress(self, job):
+        return f'{job.processed}/{job.total}'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
@@ -24,3 +228,5 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 
 admin.site.register(Comment, CommentAdmin)
+
+admin.site.register(ModerationJob, ModerationJobAdmin)
@@ -0,0 +1,120 @@
+"""JSON API только для чтения: ленты, профиль и пост.
+
+Ленты отдаются курсорными страницами, ответы помечаются ETag и
+Last-Modified (см. conditional.py), поэтому повторный запрос без
+изменений получает 304 без сериализации и выборки постов.
+"""
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from . import archive
+from .conditional import (conditional, group_validators, index_validators,
+                          post_validators, profile_validators, with_comments)
+from .constants import API_MAX_PAGE_SIZE, SHOW_TEN_POSTS
+from .counters import get_profile
+from .models import Group, Post, User
+from .utils import CursorPaginator
+
+
+def json_response(data):
+    return JsonResponse(
+        data,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+        'comments_count': post.comments_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', SHOW_TEN_POSTS))
+    except ValueError:
+        return SHOW_TEN_POSTS
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def serialize_page(request, posts):
+    page = CursorPaginator(posts, page_size(request)).get_page(
+        request.GET.get('cursor')
+    )
+    return {
+        'results': [serialize_post(post) for post in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    }
+
+
+@require_safe
+@conditional(with_comments(index_validators))
+def index(request):
+    return json_response(serialize_page(request, Post.objects.for_feed()))
+
+
+@require_safe
+@conditional(with_comments(group_validators))
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    data = serialize_page(request, group.posts.for_feed())
+    data['group'] = {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+    return json_response(data)
+
+
+@require_safe
+@conditional(with_comments(profile_validators))
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    profile = get_profile(author)
+    data = serialize_page(request, archive.author_posts(author))
+    data['author'] = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': profile.posts_count,
+        'followers_count': profile.followers_count,
+        'following_count': profile.following_count,
+    }
+    return json_response(data)
+
+
+@require_safe
+@conditional(post_validators)
+def post_detail(request, post_id):
+    post = archive.get_post_or_404(post_id)
+    data = serialize_post(post)
+    data['comments'] = [
+        serialize_comment(comment) for comment in post.comments.all()
+    ]
+    return json_response(data)
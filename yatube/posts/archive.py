@@ -0,0 +1,178 @@
+"""Архив старых постов.
+
+Почти все чтения приходятся на свежие посты, поэтому посты старше
+POSTS_ARCHIVE_AFTER_DAYS переносятся из Post в ArchivedPost вместе с
+комментариями. Основная таблица и индексы лент остаются небольшими.
+Перенос идёт пачками по ARCHIVE_BATCH_SIZE. Каждая пачка — своя
+транзакция из INSERT ... SELECT и DELETE по списку id: строки не
+загружаются в Python, а сигналы на каждую строку не срабатывают.
+
+Архивные посты сохраняют id, поэтому страница поста и профиль читают
+обе таблицы прозрачно: get_post_or_404 ищет пост сначала в Post, потом
+в архиве, а author_posts отдаёт посты автора одной выборкой для
+пагинации. Ленты, группы и поиск показывают только неархивные посты.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from . import cache, search
+from .constants import ARCHIVE_BATCH_SIZE
+from .moderation import delete_rows, post_scopes
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'comments_count',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def copy_rows(queryset, model, fields):
+    """INSERT ... SELECT полей выборки в одноимённые поля model."""
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    select, params = queryset.order_by().values_list(
+        *fields
+    ).query.get_compiler(queryset.db).as_sql()
+    columns = ', '.join(
+        quote(model._meta.get_field(name).column) for name in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'{select}',
+            params,
+        )
+
+
+def archive_batch(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит в архив пачку постов старше before; возвращает её размер.
+
+    Посты пачки блокируются до конца транзакции, поэтому комментарий,
+    добавленный во время переноса, не потеряется молча.
+    """
+    with transaction.atomic():
+        ids = list(
+            Post.objects.select_for_update().filter(
+                pub_date__lt=before
+            ).order_by('pub_date', 'pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return 0
+        posts = Post.objects.filter(pk__in=ids)
+        rows = list(posts.values_list('author_id', 'group_id'))
+        copy_rows(posts, ArchivedPost, POST_FIELDS)
+        copy_rows(
+            Comment.objects.filter(post_id__in=ids),
+            ArchivedComment,
+            COMMENT_FIELDS,
+        )
+        delete_rows(Post, ids)
+        search.get_backend().remove(ids)
+    cache.bump(*post_scopes(rows, ids))
+    return len(ids)
+
+
+def archive(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит в архив все посты старше before; возвращает их число."""
+    total = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+
+def get_post_or_404(post_id, hot=None, archived=None):
+    """Пост из Post, а если его там нет — из архива.
+
+    hot и archived — выборки Post и ArchivedPost; по умолчанию
+    for_detail(), с комментариями.
+    """
+    if hot is None:
+        hot = Post.objects.for_detail()
+    if archived is None:
+        archived = ArchivedPost.objects.for_detail()
+    try:
+        return hot.get(pk=post_id)
+    except Post.DoesNotExist:
+        return get_object_or_404(archived, pk=post_id)
+
+
+def author_posts(author):
+    return ChainedPosts(
+        author.posts.for_feed(), author.archived_posts.for_feed()
+    )
+
+
+class ChainedPosts:
+    """Посты из Post и из архива как одна выборка для пагинации.
+
+    В архив уходят посты старше всех оставшихся в Post, поэтому при
+    сортировке по убыванию даты архив продолжает основную выборку, а
+    по возрастанию — предшествует ей. Поддерживается то, что нужно
+    Paginator и CursorPaginator: count(), срезы, order_by() и filter().
+    """
+    ordered = True
+
+    def __init__(self, hot, archived, descending=True):
+        self.hot = hot
+        self.archived = archived
+        self.descending = descending
+        self.model = hot.model
+        self.counts = {}
+
+    def __repr__(self):
+        return f'<ChainedPosts {self.hot!r} + {self.archived!r}>'
+
+    def count_of(self, name):
+        if name not in self.counts:
+            self.counts[name] = getattr(self, name).count()
+        return self.counts[name]
+
+    def count(self):
+        return self.count_of('hot') + self.count_of('archived')
+
+    def order_by(self, *ordering):
+        return ChainedPosts(
+            self.hot.order_by(*ordering),
+            self.archived.order_by(*ordering),
+            descending=ordering[0].startswith('-'),
+        )
+
+    def filter(self, *args, **kwargs):
+        return ChainedPosts(
+            self.hot.filter(*args, **kwargs),
+            self.archived.filter(*args, **kwargs),
+            descending=self.descending,
+        )
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('ChainedPosts поддерживает только срезы')
+        first, second = ('hot', 'archived')
+        if not self.descending:
+            first, second = second, first
+        start = key.start or 0
+        rows = list(getattr(self, first)[start:key.stop])
+        if key.stop is not None and len(rows) == key.stop - start:
+            return rows
+        if self.counts.get(second) == 0:
+            return rows
+        offset = 0 if rows else max(start - self.count_of(first), 0)
+        stop = None
+        if key.stop is not None:
+            stop = offset + key.stop - start - len(rows)
+        return rows + list(getattr(self, second)[offset:stop])
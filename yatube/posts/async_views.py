@@ -0,0 +1,160 @@
+"""Асинхронные версии лент и страницы поста для развёртывания под ASGI.
+
+ORM Django синхронный, поэтому запросы выполняются в потоках через
+sync_to_async, а независимые запросы одной страницы (страница постов,
+подписка, счётчики, версии кэша) запускаются одновременно. Пока они
+ждут базу, цикл событий обслуживает других читателей. При
+POSTS_ASYNC_PARALLEL_QUERIES каждый запрос идёт в своём потоке и своём
+соединении с базой; иначе — по очереди в общем потоке синхронного кода.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.shortcuts import get_object_or_404, render
+
+from core.db.routers import replica_reads
+
+from . import archive, cache
+from .conditional import (conditional, group_validators, index_validators,
+                          post_validators, profile_validators)
+from .constants import FIVE_MINUTES, ONE_DAY
+from .counters import get_profile
+from .forms import CommentForm
+from .models import ArchivedPost, Comment, Group, Post, User
+from .timeline import follow_feed
+from .utils import get_paginator
+
+
+def query(func):
+    """Обёртка sync_to_async для кода, который ходит в базу."""
+    if not settings.POSTS_ASYNC_PARALLEL_QUERIES:
+        return sync_to_async(func)
+
+    @wraps(func)
+    def in_own_thread(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(in_own_thread, thread_sensitive=False)
+
+
+async def load_user(request):
+    """Загружает пользователя сессии в потоке: ленивый request.user
+    нельзя вычислять в цикле событий."""
+    await sync_to_async(getattr)(request.user, 'pk')
+    return request.user
+
+
+def load_page(posts, request):
+    page = get_paginator(posts, request)
+    # Выборка страницы выполняется здесь, в потоке, а не при рендере.
+    len(page)
+    return page
+
+
+def is_following(user, author):
+    return (
+        user.is_authenticated
+        and author.following.filter(user=user).exists()
+    )
+
+
+async def render_async(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@replica_reads
+@conditional(index_validators, vary_on_user=True)
+@cache.cached_page(FIVE_MINUTES, ONE_DAY, (cache.FEED,))
+async def index(request):
+    page_obj, fragments = await asyncio.gather(
+        query(load_page)(Post.objects.for_feed(), request),
+        query(cache.fragment_context)(cache.FEED),
+    )
+    context = {
+        'page_obj': page_obj,
+        **fragments,
+    }
+    return await render_async(request, 'posts/index.html', context)
+
+
+@replica_reads
+@conditional(group_validators, vary_on_user=True)
+async def group_posts(request, slug):
+    group = await query(get_object_or_404)(Group, slug=slug)
+    page_obj, fragments = await asyncio.gather(
+        query(load_page)(group.posts.for_feed(), request),
+        query(cache.fragment_context)(cache.group_scope(group.pk)),
+    )
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+        **fragments,
+    }
+    return await render_async(request, 'posts/group_list.html', context)
+
+
+@replica_reads
+@conditional(profile_validators, vary_on_user=True)
+async def profile(request, username):
+    author, user = await asyncio.gather(
+        query(get_object_or_404)(
+            User.objects.select_related('profile'), username=username
+        ),
+        load_user(request),
+    )
+    profile, page_obj, following, fragments = await asyncio.gather(
+        query(get_profile)(author),
+        query(load_page)(archive.author_posts(author), request),
+        query(is_following)(user, author),
+        query(cache.fragment_context)(cache.author_scope(author.pk)),
+    )
+    context = {
+        'author': author,
+        'profile': profile,
+        'page_obj': page_obj,
+        'following': following,
+        **fragments,
+    }
+    return await render_async(request, 'posts/profile.html', context)
+
+
+@replica_reads
+@conditional(post_validators, vary_on_user=True, vary_on_csrf=True)
+async def post_detail(request, post_id):
+    post, comments = await asyncio.gather(
+        query(archive.get_post_or_404)(
+            post_id,
+            Post.objects.select_related('author__profile', 'group'),
+            ArchivedPost.objects.select_related('author__profile', 'group'),
+        ),
+        query(list)(Comment.objects.filter(post_id=post_id).for_detail()),
+    )
+    if post.is_archived:
+        comments = await query(list)(post.comments.for_detail())
+    profile = await query(get_profile)(post.author)
+    context = {
+        'post': post,
+        'post_count': profile.posts_count,
+        'form': CommentForm(),
+        'comments': comments,
+    }
+    return await render_async(request, 'posts/post_detail.html', context)
+
+
+@replica_reads
+async def follow_index(request):
+    user = await load_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    page_obj = await query(load_page)(follow_feed(user).for_feed(), request)
+    context = {
+        'page_obj': page_obj,
+    }
+    return await render_async(request, 'posts/follow.html', context)
@@ -0,0 +1,199 @@
+"""Сценарии нагрузочных замеров для представлений posts.
+
+Каждый сценарий выполняется тестовым клиентом Django внутри процесса:
+так замеряется код приложения и база без сети и веб-сервера. Для
+каждого запроса сохраняются время ответа, число SQL-запросов и их
+суммарное время; итог — перцентили по всем повторам. Результаты можно
+сохранить как базовую линию и сравнивать с ней следующие прогоны.
+"""
+import json
+import statistics
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from .. import seeding
+from ..models import Group, Post, Profile
+
+Scenario = namedtuple('Scenario', ('name', 'run'))
+Fixtures = namedtuple('Fixtures', ('reader', 'author', 'group', 'post'))
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+SCENARIOS = (
+    Scenario('index', lambda client, fixtures: client.get(
+        reverse('posts:index')
+    )),
+    Scenario('follow_index', lambda client, fixtures: client.get(
+        reverse('posts:follow_index')
+    )),
+    Scenario('group_posts', lambda client, fixtures: client.get(
+        reverse('posts:group_list', args=[fixtures.group.slug])
+    )),
+    Scenario('profile', lambda client, fixtures: client.get(
+        reverse('posts:profile', args=[fixtures.author.username])
+    )),
+    Scenario('post_detail', lambda client, fixtures: client.get(
+        reverse('posts:post_detail', args=[fixtures.post.pk])
+    )),
+    Scenario('add_comment', lambda client, fixtures: client.post(
+        reverse('posts:add_comment', args=[fixtures.post.pk]),
+        {'text': 'Комментарий из замера'},
+    )),
+)
+
+
+def get_fixtures():
+    """Самые тяжёлые объекты: читатель с наибольшим числом подписок,
+    автор с наибольшим числом подписчиков, самая большая группа и самый
+    обсуждаемый пост."""
+    profiles = Profile.objects.select_related('user')
+    reader = profiles.order_by('-following_count').first()
+    author = profiles.order_by('-followers_count').first()
+    group = Group.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').first()
+    post = Post.objects.order_by('-comments_count', '-pk').first()
+    if reader is None or group is None or post is None:
+        raise BenchmarkError('В базе нет пользователей, групп или постов.')
+    return Fixtures(reader.user, author.user, group, post)
+
+
+@contextmanager
+def seeded_database(**counts):
+    """Временная тестовая база, заполненная seeding.generate(**counts)."""
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        cache.clear()
+        seeding.generate(**counts)
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1
+    ]
+
+
+class QueryTimer:
+    """execute_wrapper, считающий SQL-запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - started
+
+
+def measure(scenario, client, fixtures, requests, warmup=0, cold=False):
+    """Выполняет сценарий и возвращает сводку замеров в миллисекундах.
+
+    События outbox, как в продакшене, остаются воркеру и в замер не
+    попадают, даже если POSTS_OUTBOX_EAGER включён в окружении.
+    """
+    with override_settings(POSTS_OUTBOX_EAGER=False):
+        return run_measure(
+            scenario, client, fixtures, requests, warmup, cold
+        )
+
+
+def run_measure(scenario, client, fixtures, requests, warmup, cold):
+    for _ in range(warmup):
+        scenario.run(client, fixtures)
+    latencies, queries, query_times = [], [], []
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = scenario.run(client, fixtures)
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f'{scenario.name}: ответ {response.status_code}'
+            )
+        queries.append(timer.count)
+        query_times.append(timer.time * 1000)
+    return {
+        'requests': requests,
+        'p50': round(percentile(latencies, 50), 2),
+        'p90': round(percentile(latencies, 90), 2),
+        'p99': round(percentile(latencies, 99), 2),
+        'max': round(max(latencies), 2),
+        'queries': max(queries),
+        'query_time': round(statistics.median(query_times), 2),
+    }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def compare(results, baseline):
+    """Регрессии относительно базовой линии: рост числа запросов.
+
+    Число запросов от машины не зависит, поэтому расти не должно вовсе.
+    Сценарий без базовой линии тоже регрессия: иначе новый сценарий
+    остался бы без проверки.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            regressions.append(f'{name}: нет в базовой линии')
+        elif result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {result["queries"]} '
+                f'вместо {base["queries"]}'
+            )
+    return regressions
+
+
+def slowdowns(results, baseline, tolerance):
+    """Медианы времени, выросшие больше чем на долю tolerance.
+
+    Время в процессе на полсотни запросов заметно плавает от прогона к
+    прогону и от машины к машине, поэтому это лишь предупреждения.
+    """
+    warnings = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is not None and result['p50'] > base['p50'] * (
+            1 + tolerance
+        ):
+            warnings.append(
+                f'{name}: p50 {result["p50"]} мс вместо {base["p50"]} мс'
+            )
+    return warnings
@@ -0,0 +1,76 @@
+"""Планы SQL-запросов сценариев: используют ли они индексы.
+
+Сценарий выполняется с холодным кэшем, каждый его SELECT повторяется с
+EXPLAIN, а строки плана сверяются с шаблонами. Полный просмотр таблицы
+считается ошибкой, сортировка без индекса — замечанием: для коротких
+выборок, например лент подписок после слияния, она допустима.
+"""
+import re
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+
+Plan = namedtuple('Plan', ('sql', 'lines', 'problems', 'notes'))
+
+PATTERNS = {
+    'sqlite': {
+        'problems': re.compile(r'^SCAN (TABLE )?\w+$'),
+        'notes': re.compile(r'USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY'),
+    },
+    'postgresql': {
+        'problems': re.compile(r'Seq Scan on \w+'),
+        'notes': re.compile(r'-> +Sort |^Sort '),
+    },
+}
+
+
+class QueryRecorder:
+    """execute_wrapper, запоминающий SELECT-запросы с параметрами."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def analyze(sql, params):
+    lines = explain(sql, params)
+    patterns = PATTERNS.get(connection.vendor)
+    if patterns is None:
+        return Plan(sql, lines, [], [])
+    return Plan(
+        sql,
+        lines,
+        [line for line in lines if patterns['problems'].search(line.strip())],
+        [line for line in lines if patterns['notes'].search(line.strip())],
+    )
+
+
+def scenario_plans(scenario, client, fixtures):
+    """Планы всех SELECT сценария; повторяющийся SQL разбирается раз."""
+    cache.clear()
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        scenario.run(client, fixtures)
+    seen = set()
+    plans = []
+    for sql, params in recorder.queries:
+        if sql in seen:
+            continue
+        seen.add(sql)
+        plans.append(analyze(sql, params))
+    return plans
@@ -0,0 +1,266 @@
+"""Кэш страниц и фрагментов с версиями областей.
+
+У каждой области (общая лента, группа, автор, пост, подписки
+пользователя) есть счётчик поколения. Сигналы увеличивают его при
+изменении данных, а ключи кэша включают текущие поколения, поэтому
+устаревшие записи просто перестают читаться и доживают свой TTL.
+Вместе с поколением запоминается время изменения области — из него
+conditional.py строит Last-Modified.
+
+Страницы целиком кэширует cached_page: запись хранит версию, с которой
+она посчитана, и после изменения данных её пересчитывает один запрос,
+пока остальные получают устаревшую копию.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import time
+from collections import namedtuple
+from functools import wraps
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .constants import ONE_DAY
+from .metrics import PAGE_CACHE
+
+FEED = 'feed'
+# Число комментариев к постам. Его показывают только ленты API, поэтому
+# комментарий не сбрасывает FEED и HTML-страницы лент.
+COMMENTS = 'comments'
+VERSION_KEY = 'posts:version:{}'
+MODIFIED_KEY = 'posts:modified:{}'
+PAGE_KEY = 'posts:page:{view}:{method}:{user}:{path}'
+XFETCH_BETA = 1.0
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+PageLookup = namedtuple('PageLookup', ('key', 'lock_key', 'version', 'locked'))
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def initial_version():
+    # Начинаем со времени, чтобы после вытеснения счётчика из кэша
+    # поколения не повторились и старые записи не ожили.
+    return int(time.time() * 1000)
+
+
+def get_version(*scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, initial_version(), timeout=None)
+    now = time.time()
+    cache.set_many(
+        {MODIFIED_KEY.format(scope): now for scope in scopes}, timeout=None
+    )
+
+
+def get_modified(*scopes):
+    """Время последнего изменения областей или None, если неизвестно."""
+    stamps = cache.get_many([MODIFIED_KEY.format(scope) for scope in scopes])
+    return max(stamps.values(), default=None)
+
+
+def fragment_context(*scopes):
+    """Переменные шаблона для {% cache %} с версиями областей."""
+    return {
+        'cache_timeout': ONE_DAY,
+        'cache_version': get_version(*scopes),
+    }
+
+
+def page_key(view, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    return PAGE_KEY.format(
+        view=f'{view.__module__}.{view.__name__}',
+        method=request.method,
+        user=user_id,
+        path=path,
+    )
+
+
+def is_fresh(entry, version, beta):
+    """Свежая ли запись, с ранним вероятностным обновлением (XFetch).
+
+    Чем дольше страница рендерится и чем ближе мягкий срок, тем выше
+    шанс, что запрос обновит её заранее, не дожидаясь общего промаха.
+    """
+    if entry['version'] != version:
+        return False
+    early = entry['delta'] * beta * math.log(1 - random.random())
+    return time.time() - early < entry['expires']
+
+
+def cached_page(soft_timeout, hard_timeout, scopes=(), beta=XFETCH_BETA):
+    """Кэш страницы с одиночным пересчётом и выдачей устаревшей копии.
+
+    Запись считается свежей soft_timeout секунд и пока версии областей
+    не менялись, а хранится hard_timeout секунд. Устаревшую страницу
+    пересчитывает только запрос, взявший блокировку в кэше; остальные
+    в это время получают устаревшую копию. scopes — области или
+    функция от аргументов представления, возвращающая области.
+    Асинхронное представление обращается к кэшу из потока и ждёт
+    чужого пересчёта, не блокируя цикл событий.
+    """
+    def decorator(view):
+        page = PageCache(view, soft_timeout, hard_timeout, scopes, beta)
+        if asyncio.iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                return await page.async_response(request, args, kwargs)
+        else:
+            def wrapper(request, *args, **kwargs):
+                return page.response(request, args, kwargs)
+        return wraps(view)(wrapper)
+    return decorator
+
+
+class PageCache:
+    """Шаги cached_page, общие для обычных и асинхронных представлений."""
+
+    def __init__(self, view, soft_timeout, hard_timeout, scopes, beta):
+        self.view = view
+        self.soft_timeout = soft_timeout
+        self.hard_timeout = hard_timeout
+        self.scopes = scopes
+        self.beta = beta
+
+    def response(self, request, args, kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return self.view(request, *args, **kwargs)
+        response, lookup = self.lookup(request, kwargs)
+        if response is not None:
+            return response
+        if not lookup.locked:
+            entry = wait_for_page(lookup.key)
+            self.count('wait' if entry is not None else 'miss')
+            if entry is not None:
+                return entry['response']
+            return self.view(request, *args, **kwargs)
+        try:
+            started = time.monotonic()
+            response = self.view(request, *args, **kwargs)
+            self.store(lookup, response, time.monotonic() - started)
+        finally:
+            cache.delete(lookup.lock_key)
+        return response
+
+    async def async_response(self, request, args, kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await self.view(request, *args, **kwargs)
+        response, lookup = await sync_to_async(self.lookup)(request, kwargs)
+        if response is not None:
+            return response
+        if not lookup.locked:
+            entry = await async_wait_for_page(lookup.key)
+            self.count('wait' if entry is not None else 'miss')
+            if entry is not None:
+                return entry['response']
+            return await self.view(request, *args, **kwargs)
+        try:
+            started = time.monotonic()
+            response = await self.view(request, *args, **kwargs)
+            await sync_to_async(self.store)(
+                lookup, response, time.monotonic() - started
+            )
+        finally:
+            await sync_to_async(cache.delete)(lookup.lock_key)
+        return response
+
+    def lookup(self, request, kwargs):
+        """Возвращает (ответ из кэша или None, PageLookup).
+
+        Если ответа нет, а блокировка взята, страницу считает этот
+        запрос; если не взята — её уже считает другой.
+        """
+        scopes = self.scopes
+        if callable(scopes):
+            scopes = scopes(**kwargs)
+        version = get_version(*scopes)
+        key = page_key(self.view, request)
+        lookup = PageLookup(key, f'{key}:lock', version, False)
+        entry = cache.get(key)
+        if entry is not None and is_fresh(entry, version, self.beta):
+            self.count('hit')
+            return entry['response'], lookup
+        if cache.add(lookup.lock_key, True, LOCK_TIMEOUT):
+            self.count('miss')
+            return None, lookup._replace(locked=True)
+        if entry is not None:
+            self.count('stale')
+            response = entry['response']
+            response.is_stale = entry['version'] != version
+            return response, lookup
+        return None, lookup
+
+    def store(self, lookup, response, delta):
+        if is_cacheable(response):
+            cache.set(lookup.key, {
+                'response': response,
+                'version': lookup.version,
+                'delta': delta,
+                'expires': time.time() + self.soft_timeout,
+            }, self.hard_timeout)
+
+    def count(self, result):
+        PAGE_CACHE.labels(self.view.__name__, result).inc()
+
+
+def wait_for_page(key):
+    """Ждёт, пока страницу посчитает запрос, взявший блокировку."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def async_wait_for_page(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await sync_to_async(cache.get)(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def is_cacheable(response):
+    return (
+        response.status_code == HTTPStatus.OK
+        and not response.cookies
+        and not response.streaming
+    )
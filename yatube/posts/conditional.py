@@ -0,0 +1,184 @@
+"""Условные GET-запросы: ETag и Last-Modified по версиям данных.
+
+Валидаторы считаются без рендера и почти без базы: ETag собирается из
+поколений областей кэша (см. cache.py) и даты последнего поста, которую
+отдаёт один запрос по индексу pub_date. Last-Modified — самое позднее из
+даты публикации и времени последнего изменения областей.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import cache
+from .models import ArchivedPost, Group, Post, User
+
+
+class Validators:
+    """ETag и Last-Modified ответа."""
+
+    def __init__(self, request, scopes, latest=None):
+        self.parts = [request.get_full_path()]
+        self.scopes = scopes
+        self.latest = latest
+
+    @property
+    def etag(self):
+        parts = (*self.parts, cache.get_version(*self.scopes), self.latest)
+        digest = hashlib.md5(
+            ':'.join(str(part) for part in parts).encode()
+        ).hexdigest()
+        return quote_etag(digest)
+
+    @property
+    def last_modified(self):
+        stamps = [cache.get_modified(*self.scopes)]
+        if self.latest is not None:
+            stamps.append(self.latest.timestamp())
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        return int(max(stamps)) if stamps else None
+
+
+def first_row(queryset, default):
+    """Первая строка выборки по уникальному полю. В отличие от first()
+    не добавляет ORDER BY pk, из-за которого база сортировала бы
+    результат группировки."""
+    return next(iter(queryset[:1]), default)
+
+
+def index_validators(request):
+    latest = Post.objects.aggregate(latest=Max('pub_date'))['latest']
+    return Validators(request, (cache.FEED,), latest)
+
+
+def group_validators(request, slug):
+    group_id, latest = first_row(Group.objects.filter(slug=slug).annotate(
+        latest=Max('posts__pub_date')
+    ).values_list('pk', 'latest'), (None, None))
+    return Validators(request, (cache.group_scope(group_id),), latest)
+
+
+def profile_validators(request, username):
+    author_id, latest = first_row(
+        User.objects.filter(username=username).annotate(
+            latest=Max('posts__pub_date')
+        ).values_list('pk', 'latest'),
+        (None, None),
+    )
+    return Validators(request, (cache.author_scope(author_id),), latest)
+
+
+def post_validators(request, post_id):
+    for model in (Post, ArchivedPost):
+        post = first_row(model.objects.filter(pk=post_id).annotate(
+            last_comment=Max('comments__created')
+        ).values_list('author', 'pub_date', 'last_comment'), None)
+        if post is not None:
+            break
+    else:
+        return Validators(request, (cache.post_scope(post_id),))
+    author_id, pub_date, last_comment = post
+    return Validators(
+        request,
+        (cache.post_scope(post_id), cache.author_scope(author_id)),
+        max(pub_date, last_comment or pub_date),
+    )
+
+
+def with_comments(validators):
+    """Валидаторы лент API: в них есть число комментариев к постам."""
+    @wraps(validators)
+    def wrapper(request, *args, **kwargs):
+        current = validators(request, *args, **kwargs)
+        current.scopes = (*current.scopes, cache.COMMENTS)
+        return current
+    return wrapper
+
+
+def conditional(validators, vary_on_user=False, vary_on_csrf=False):
+    """Отвечает 304, если у клиента актуальная версия ответа.
+
+    validators(request, **kwargs) возвращает Validators. Если ответ
+    зависит от пользователя, vary_on_user добавляет его в ETag. Страницам
+    с формами нужен vary_on_csrf: токен меняется при входе, и форма из
+    закэшированной браузером страницы не прошла бы проверку CSRF.
+    Устаревшую копию из cached_page валидаторами не помечаем, иначе
+    клиент закэшировал бы её под ETag новой версии. Работает и с
+    асинхронными представлениями: валидаторы тогда считаются в потоке.
+    """
+    def decorator(view):
+        vary = (vary_on_user, vary_on_csrf)
+        if asyncio.iscoroutinefunction(view):
+            return async_conditional_view(view, validators, vary)
+        return conditional_view(view, validators, vary)
+    return decorator
+
+
+def conditional_view(view, validators, vary):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        response, etag, last_modified = check(
+            request, validators, vary, args, kwargs
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if not is_validatable(response):
+                return response
+        return add_validators(response, etag, last_modified)
+    return wrapper
+
+
+def async_conditional_view(view, validators, vary):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await view(request, *args, **kwargs)
+        response, etag, last_modified = await sync_to_async(check)(
+            request, validators, vary, args, kwargs
+        )
+        if response is None:
+            response = await view(request, *args, **kwargs)
+            if not is_validatable(response):
+                return response
+        return add_validators(response, etag, last_modified)
+    return wrapper
+
+
+def check(request, validators, vary, args, kwargs):
+    """Возвращает (ответ 304/412 или None, ETag, Last-Modified)."""
+    vary_on_user, vary_on_csrf = vary
+    current = validators(request, *args, **kwargs)
+    if vary_on_user:
+        current.parts.append(request.user.pk or 0)
+    if vary_on_csrf and request.user.is_authenticated:
+        # Токен создаётся до рендера, чтобы ETag первого ответа уже
+        # совпадал с токеном в форме.
+        get_token(request)
+        current.parts.append(request.META['CSRF_COOKIE'])
+    etag = current.etag
+    last_modified = current.last_modified
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    return response, etag, last_modified
+
+
+def is_validatable(response):
+    return response.status_code == HTTPStatus.OK and not getattr(
+        response, 'is_stale', False
+    )
+
+
+def add_validators(response, etag, last_modified):
+    response.headers.setdefault('ETag', etag)
+    if last_modified is not None:
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
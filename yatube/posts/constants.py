@@ -2,4 +2,22 @@ SHOW_TEN_POSTS = 10
 FIFTEEN_CHARACTERS = 15
 SHOW_THREE_POSTS = 3
 ONE_POST = 1
-TWENTY_SECONDS = 20
+ONE_DAY = 60 * 60 * 24
+FIVE_MINUTES = 60 * 5
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+TIMELINE_LENGTH = 500
+FANOUT_FOLLOWERS_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 1000
+THUMBNAIL_MAX_ATTEMPTS = 3
+IMAGE_MAX_SIZE = 5 * 1024 * 1024
+IMAGE_MAX_PIXELS = 5000 * 5000
+IMAGE_HEADER_MAX_BYTES = 256 * 1024
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+API_MAX_PAGE_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BATCH_SIZE = 500
+DIGEST_BATCH_SIZE = 500
+ADMIN_EXACT_COUNT_LIMIT = 10000
+MODERATION_CHUNK_SIZE = 500
+ARCHIVE_BATCH_SIZE = 500
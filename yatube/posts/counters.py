@@ -0,0 +1,75 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через F()-выражения при создании и удалении
+Post, Comment и Follow, а reconcile_*() пересчитывают их по таблицам.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedPost, Comment, Follow, Post, Profile, User
+
+
+def get_profile(user):
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        reconcile_profiles([user.pk])
+        return Profile.objects.get(user=user)
+
+
+def change_profile(user_id, delta, *fields):
+    profiles = Profile.objects.filter(user_id=user_id)
+    if delta < 0:
+        for field in fields:
+            profiles.filter(**{f'{field}__gt': 0}).update(
+                **{field: F(field) + delta}
+            )
+        return
+    updated = profiles.update(
+        **{field: F(field) + delta for field in fields}
+    )
+    if not updated:
+        reconcile_profiles([user_id])
+
+
+def change_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gt=0)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def count_of(model, field, outer_ref):
+    counts = model.objects.filter(
+        **{field: OuterRef(outer_ref)}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_profiles(user_ids=None):
+    """Создаёт недостающие профили и пересчитывает их счётчики."""
+    users = User.objects.filter(profile__isnull=True)
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+        profiles = profiles.filter(user__in=user_ids)
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in users.values_list('pk', flat=True)],
+        ignore_conflicts=True,
+    )
+    return profiles.update(
+        posts_count=(
+            count_of(Post, 'author', 'user')
+            + count_of(ArchivedPost, 'author', 'user')
+        ),
+        followers_count=count_of(Follow, 'author', 'user'),
+        following_count=count_of(Follow, 'user', 'user'),
+    )
+
+
+def reconcile_posts(posts=None):
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.order_by().update(
+        comments_count=count_of(Comment, 'post', 'pk')
+    )
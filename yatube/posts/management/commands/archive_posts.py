@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import archive
+from posts.constants import ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Возраст поста в днях; по умолчанию '
+                 'POSTS_ARCHIVE_AFTER_DAYS.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить в одной транзакции.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а переносить посты по мере старения.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60 * 60,
+            help='Пауза в секундах между проходами с --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            moved = archive.archive(
+                archive.cutoff(options['days']), options['batch_size']
+            )
+            self.stdout.write(f'{moved} постов перенесено в архив')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,137 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from posts import benchmarks
+
+BASELINE = os.path.join(os.path.dirname(benchmarks.__file__), 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа и SQL-запросы представлений posts. '
+        'По умолчанию создаёт тестовую базу и заполняет её генератором.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--existing-db',
+            action='store_true',
+            help=(
+                'Замерять на текущей базе без генерации данных. '
+                'Сценарий add_comment пишет в неё комментарии.'
+            ),
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            choices=[scenario.name for scenario in benchmarks.SCENARIOS],
+            help='Запустить только этот сценарий.',
+        )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--baseline',
+            nargs='?',
+            const=BASELINE,
+            help='Сравнить с базовой линией (по умолчанию из репозитория).',
+        )
+        parser.add_argument(
+            '--save-baseline',
+            nargs='?',
+            const=BASELINE,
+            help='Сохранить результаты как базовую линию.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.5,
+            help=(
+                'Рост медианы времени, после которого выводится '
+                'предупреждение, доля.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['existing_db']:
+            results = self.run(options)
+        else:
+            with benchmarks.seeded_database(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                seed=options['seed'],
+                log=self.stdout.write,
+            ):
+                results = self.run(options)
+        self.report(results)
+        if options['save_baseline']:
+            benchmarks.save_baseline(options['save_baseline'], results)
+            self.stdout.write(
+                f'Базовая линия сохранена в {options["save_baseline"]}'
+            )
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def run(self, options):
+        try:
+            fixtures = benchmarks.get_fixtures()
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(error)
+        client = Client()
+        client.force_login(fixtures.reader)
+        scenarios = [
+            scenario for scenario in benchmarks.SCENARIOS
+            if not options['scenarios']
+            or scenario.name in options['scenarios']
+        ]
+        results = {}
+        for scenario in scenarios:
+            try:
+                results[scenario.name] = benchmarks.measure(
+                    scenario, client, fixtures,
+                    options['requests'], options['warmup'], options['cold'],
+                )
+            except benchmarks.BenchmarkError as error:
+                raise CommandError(error)
+        return results
+
+    def report(self, results):
+        columns = ('p50', 'p90', 'p99', 'max', 'queries', 'query_time')
+        self.stdout.write(
+            f'{"сценарий":<14}' + ''.join(f'{name:>12}' for name in columns)
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14}'
+                + ''.join(f'{result[column]:>12}' for column in columns)
+            )
+
+    def check_baseline(self, results, options):
+        baseline = benchmarks.load_baseline(options['baseline'])
+        for warning in benchmarks.slowdowns(
+            results, baseline, options['tolerance']
+        ):
+            self.stdout.write(self.style.WARNING(f'Медленнее: {warning}'))
+        regressions = benchmarks.compare(results, baseline)
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базовой линии:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from posts import benchmarks
+from posts.benchmarks import plans
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет планы SQL-запросов представлений posts: запросы не '
+        'должны просматривать таблицы целиком. По умолчанию создаёт '
+        'тестовую базу и заполняет её генератором.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--existing-db',
+            action='store_true',
+            help=(
+                'Проверять на текущей базе без генерации данных. '
+                'Сценарий add_comment пишет в неё комментарий.'
+            ),
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            choices=[scenario.name for scenario in benchmarks.SCENARIOS],
+            help='Проверить только этот сценарий.',
+        )
+
+    def handle(self, *args, **options):
+        if options['existing_db']:
+            problems = self.check_plans(options)
+        else:
+            with benchmarks.seeded_database(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                seed=options['seed'],
+            ):
+                problems = self.check_plans(options)
+        if problems:
+            raise CommandError(f'Запросов без индекса: {problems}')
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
+
+    def check_plans(self, options):
+        try:
+            fixtures = benchmarks.get_fixtures()
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(error)
+        client = Client()
+        client.force_login(fixtures.reader)
+        problems = 0
+        for scenario in benchmarks.SCENARIOS:
+            if options['scenarios'] and (
+                scenario.name not in options['scenarios']
+            ):
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(scenario.name))
+            for plan in plans.scenario_plans(scenario, client, fixtures):
+                problems += len(plan.problems)
+                self.report(plan, options['verbosity'])
+        return problems
+
+    def report(self, plan, verbosity):
+        if not plan.problems and not plan.notes and verbosity < 2:
+            return
+        self.stdout.write(f'  {plan.sql}')
+        for line in plan.lines:
+            if line in plan.problems:
+                line = self.style.ERROR(line)
+            elif line in plan.notes:
+                line = self.style.WARNING(line)
+            self.stdout.write(f'    {line}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import moderation
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи массовой модерации из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые задачи.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах между проверками очереди с --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            moderation.requeue_stuck()
+            job_ids = moderation.pending_jobs()
+            done = sum(moderation.process(job_id) for job_id in job_ids)
+            if job_ids:
+                self.stdout.write(f'{done}/{len(job_ids)} задач выполнено')
+            if not options['loop']:
+                break
+            if not job_ids:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import notifications, outbox
+from posts.constants import OUTBOX_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь событий: раскладывает посты по лентам, '
+        'сохраняет уведомления и ставит в очередь почты дайджесты, '
+        'которым подошёл срок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Сколько событий забирать за один проход.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые события.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах между проверками очереди с --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            taken, done = outbox.process(options['batch_size'])
+            if taken:
+                self.stdout.write(f'{done}/{taken} событий обработано')
+            digests = notifications.send_digests()
+            if digests:
+                self.stdout.write(f'{digests} дайджестов отправлено')
+            if not options['loop']:
+                break
+            if taken < options['batch_size']:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи очереди миниатюр.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Сколько задач забирать из очереди за один проход.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые задачи.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах между проверками очереди с --loop.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            thumbnails.requeue_stuck()
+            job_ids = thumbnails.pending_jobs(options['batch_size'])
+            done = sum(thumbnails.process(job_id) for job_id in job_ids)
+            if job_ids:
+                self.stdout.write(
+                    f'{done}/{len(job_ids)} задач выполнено'
+                )
+            if not options['loop']:
+                break
+            if not job_ids:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
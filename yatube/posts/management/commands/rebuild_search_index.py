@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов индексировать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.clear()
+        batch_size = options['batch_size']
+        posts = Post.objects.order_by('pk').only(
+            'text', 'author', 'group'
+        )
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            backend.index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'{indexed} постов проиндексировано')
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из Follow и Post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Пересобрать ленту только этого пользователя.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько лент пересобирать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.all()
+        if options['usernames']:
+            follows = follows.filter(user__username__in=options['usernames'])
+        user_ids = list(
+            follows.order_by('user').values_list('user', flat=True).distinct()
+        )
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            timeline.rebuild(user_ids[start:start + batch_size])
+            self.stdout.write(
+                f'{min(start + batch_size, len(user_ids))}'
+                f'/{len(user_ids)} лент пересобрано'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько постов пересчитывать одним UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        profiles = counters.reconcile_profiles()
+        self.stdout.write(f'{profiles} профилей пересчитано')
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', flat=True
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            total += counters.reconcile_posts(
+                Post.objects.filter(pk__gte=batch[0], pk__lte=batch[-1])
+            )
+            last_pk = batch[-1]
+        self.stdout.write(f'{total} постов пересчитано')
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно — одинаковые данные.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=seeding.BATCH_SIZE,
+            help='Сколько строк вставлять одним запросом.',
+        )
+        parser.add_argument(
+            '--author-exponent',
+            type=float,
+            default=1.0,
+            help='Показатель степени распределения постов по авторам.',
+        )
+        parser.add_argument(
+            '--follower-exponent',
+            type=float,
+            default=1.0,
+            help='Показатель степени распределения подписчиков.',
+        )
+        parser.add_argument(
+            '--comment-exponent',
+            type=float,
+            default=1.0,
+            help='Показатель степени распределения комментариев.',
+        )
+        parser.add_argument(
+            '--images',
+            type=float,
+            default=0.0,
+            help='Доля постов с картинкой, от 0 до 1.',
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('--images должно быть от 0 до 1.')
+        started = time.monotonic()
+        seeding.generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+            author_exponent=options['author_exponent'],
+            follower_exponent=options['follower_exponent'],
+            comment_exponent=options['comment_exponent'],
+            image_ratio=options['images'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
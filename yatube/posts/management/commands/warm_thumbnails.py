@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры картинок всех постов в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; 1 — без дочерних процессов.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Сколько постов передавать процессу за раз.',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = list(
+            Post.objects.exclude(image='').order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        batch_size = options['batch_size']
+        batches = [
+            post_ids[start:start + batch_size]
+            for start in range(0, len(post_ids), batch_size)
+        ]
+        if options['processes'] <= 1:
+            results = map(thumbnails.warm, batches)
+            self.report(results, len(post_ids))
+            return
+        # Дочерние процессы не должны пользоваться соединениями
+        # родителя, поэтому закрываем их до запуска пула.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'],
+            initializer=connections.close_all,
+        ) as pool:
+            self.report(pool.map(thumbnails.warm, batches), len(post_ids))
+
+    def report(self, results, total):
+        warmed = 0
+        for count in results:
+            warmed += count
+            self.stdout.write(f'{warmed}/{total} картинок обработано')
+        self.stdout.write(self.style.SUCCESS('Готово'))
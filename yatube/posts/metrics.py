@@ -0,0 +1,24 @@
+"""Метрики posts: кэш страниц, загрузки картинок и миниатюры."""
+from prometheus_client import Counter, Histogram
+
+PAGE_CACHE = Counter(
+    'yatube_page_cache_requests',
+    'Обращения к кэшу страниц: hit, stale, wait или miss.',
+    ['page', 'result'],
+)
+UPLOAD_SIZE = Histogram(
+    'yatube_upload_size_bytes',
+    'Размер принятых картинок постов.',
+    buckets=(
+        16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 2 * 1024 * 1024,
+        5 * 1024 * 1024, float('inf'),
+    ),
+)
+UPLOADS_REJECTED = Counter(
+    'yatube_uploads_rejected',
+    'Картинки, отклонённые при загрузке.',
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Время создания всех миниатюр одной картинки.',
+)
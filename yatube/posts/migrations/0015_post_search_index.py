@@ -0,0 +1,69 @@
+from django.db import migrations
+
+from posts.stemmer import stem_text
+
+# Схема индекса зафиксирована здесь, а не берётся из posts.search:
+# миграция не должна зависеть от того, как потом изменятся бэкенды
+# поиска и модель Post.
+FTS_TABLE = 'posts_post_fts'
+BATCH_SIZE = 1000
+
+
+def create_postgres_index(schema_editor):
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS posts_post_text_fts '
+        "ON posts_post USING gin (to_tsvector('russian', text))"
+    )
+
+
+def create_sqlite_index(schema_editor):
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        'body, author_id UNINDEXED, group_id UNINDEXED, '
+        "tokenize = 'unicode61')"
+    )
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                'SELECT id, text, author_id, group_id FROM posts_post '
+                'WHERE id > %s ORDER BY id LIMIT %s',
+                [last_id, BATCH_SIZE]
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} '
+                '(rowid, body, author_id, group_id) VALUES (%s, %s, %s, %s)',
+                [
+                    (pk, stem_text(text), author_id, group_id)
+                    for pk, text, author_id, group_id in rows
+                ]
+            )
+            last_id = rows[-1][0]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        create_postgres_index(schema_editor)
+    else:
+        create_sqlite_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS posts_post_text_fts')
+    else:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_profile_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
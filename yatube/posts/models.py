@@ -15,6 +15,44 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'image', 'comments_count', 'author', 'group',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug',
+        )
+
+    def for_detail(self):
+        """Пост со всеми комментариями и их авторами."""
+        return self.select_related(
+            'author__profile', 'group'
+        ).prefetch_related(
+            models.Prefetch('comments', queryset=Comment.objects.for_detail())
+        )
+
+
+class ArchivedPostQuerySet(PostQuerySet):
+
+    def for_detail(self):
+        return self.select_related(
+            'author__profile', 'group'
+        ).prefetch_related(
+            models.Prefetch(
+                'comments', queryset=ArchivedComment.objects.for_detail()
+            )
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def for_detail(self):
+        """Комментарии в порядке написания вместе с авторами."""
+        return self.select_related('author').order_by('created', 'pk')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -45,11 +83,30 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    is_archived = False
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_pub_date_idx'
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:FIFTEEN_CHARACTERS]
@@ -77,6 +134,16 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx'
+            ),
+        )
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -89,3 +156,299 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+        )
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(
+        User,
+        related_name='profile',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self) -> str:
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date'),
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+
+
+class ThumbnailJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.OneToOneField(
+        Post,
+        related_name='thumbnail_job',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    updated = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Задача миниатюр'
+        verbose_name_plural = 'Задачи миниатюр'
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.status}'
+
+
+class OutboxEvent(models.Model):
+    """Событие, записанное в одной транзакции с изменением данных.
+
+    Ссылка на объект хранится числом, а не внешним ключом: удаление
+    объекта не трогает очередь, обработчик просто пропускает событие.
+    """
+    POST_CREATED = 'post_created'
+    COMMENT_CREATED = 'comment_created'
+    FOLLOW_CREATED = 'follow_created'
+    KINDS = (
+        (POST_CREATED, 'Новый пост'),
+        (COMMENT_CREATED, 'Новый комментарий'),
+        (FOLLOW_CREATED, 'Новая подписка'),
+    )
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField('Событие', max_length=20, choices=KINDS)
+    object_id = models.PositiveIntegerField('ID объекта')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+
+    def __str__(self) -> str:
+        return f'{self.kind}: {self.object_id}'
+
+
+class Notification(models.Model):
+    """Уведомление, которое ждёт отправки в дайджесте."""
+    user = models.ForeignKey(
+        User,
+        related_name='notifications',
+        on_delete=models.CASCADE,
+        verbose_name='Получатель'
+    )
+    kind = models.CharField(
+        'Событие',
+        max_length=20,
+        choices=OutboxEvent.KINDS
+    )
+    data = models.JSONField('Данные')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = (
+            models.Index(
+                fields=('user', 'created'),
+                name='notification_user_created_idx'
+            ),
+        )
+
+
+class ModerationJob(models.Model):
+    """Массовое действие модератора, выполняемое в фоне пачками."""
+    DELETE_AUTHORS_POSTS = 'delete_authors_posts'
+    MOVE_TO_GROUP = 'move_to_group'
+    PURGE_COMMENTS = 'purge_comments'
+    ACTIONS = (
+        (DELETE_AUTHORS_POSTS, 'Удаление постов авторов'),
+        (MOVE_TO_GROUP, 'Перенос постов в группу'),
+        (PURGE_COMMENTS, 'Удаление комментариев авторов'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=30, choices=ACTIONS)
+    params = models.JSONField('Параметры')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True
+    )
+    total = models.PositiveIntegerField('Всего строк', default=0)
+    processed = models.PositiveIntegerField('Обработано строк', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        User,
+        related_name='moderation_jobs',
+        on_delete=models.SET_NULL,
+        null=True,
+        verbose_name='Модератор'
+    )
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    updated = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Задача модерации'
+        verbose_name_plural = 'Задачи модерации'
+
+    def __str__(self) -> str:
+        return f'{self.get_action_display()}: {self.status}'
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из Post по возрасту (см. archive.py).
+
+    id сохраняется, поэтому ссылки на пост продолжают работать. Архивные
+    посты только читаются: править и комментировать их нельзя.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0
+    )
+
+    objects = ArchivedPostQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='archivedpost_author_date_idx'
+            ),
+        )
+
+    def __str__(self) -> str:
+        return self.text[:FIFTEEN_CHARACTERS]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий архивного поста."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата комментария')
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='archivedcomment_post_idx'
+            ),
+        )
@@ -0,0 +1,208 @@
+"""Массовые действия модераторов в фоне.
+
+Админка создаёт ModerationJob; после коммита задача уходит пулу
+потоков процесса, а невыполненные задачи добирает команда
+process_moderation. Задача берёт строки пачками по
+MODERATION_CHUNK_SIZE: каждая пачка — своя транзакция с одним
+UPDATE или DELETE по списку id, без загрузки объектов и сигналов на
+каждую строку. То, что делали бы сигналы — счётчики, поисковый индекс,
+версии кэша, — выполняется один раз на пачку. Прерванная задача
+продолжается с того места, где остановилась: пачка выбирается из
+ещё не обработанных строк.
+"""
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, counters, search
+from .constants import MODERATION_CHUNK_SIZE
+from .models import Comment, ModerationJob, Post
+
+RUNNING_TIMEOUT = datetime.timedelta(minutes=30)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_MODERATION_WORKERS,
+                thread_name_prefix='moderation',
+            )
+        return _executor
+
+
+def enqueue(action, params, user):
+    """Создаёт задачу; пул получит её после коммита."""
+    job = ModerationJob.objects.create(
+        action=action, params=params, created_by=user
+    )
+    if settings.POSTS_MODERATION_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_thread, job.pk)
+        )
+    return job
+
+
+def run_in_thread(job_id):
+    close_old_connections()
+    try:
+        process(job_id)
+    finally:
+        close_old_connections()
+
+
+def delete_rows(model, ids):
+    """DELETE по списку id вместе со строками, которые ссылаются на них.
+
+    Каскад идёт на один уровень: у зависимых моделей постов своих
+    зависимых нет.
+    """
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': ids}
+        )
+        if relation.on_delete is models.CASCADE:
+            related._raw_delete(related.db)
+        else:
+            related.update(**{relation.field.name: None})
+    rows = model._base_manager.filter(pk__in=ids)
+    rows._raw_delete(rows.db)
+
+
+def post_scopes(rows, ids):
+    """Области кэша для пачки постов по парам (автор, группа)."""
+    scopes = {cache.FEED}
+    for author_id, group_id in rows:
+        scopes.add(cache.author_scope(author_id))
+        if group_id is not None:
+            scopes.add(cache.group_scope(group_id))
+    scopes.update(cache.post_scope(pk) for pk in ids)
+    return scopes
+
+
+def authors_posts(params):
+    return Post.objects.filter(author_id__in=params['author_ids'])
+
+
+def delete_posts(params, ids):
+    rows = list(
+        Post.objects.filter(pk__in=ids).values_list('author_id', 'group_id')
+    )
+    delete_rows(Post, ids)
+    search.get_backend().remove(ids)
+    counters.reconcile_profiles({author_id for author_id, _ in rows})
+    return post_scopes(rows, ids)
+
+
+def posts_outside_group(params):
+    return Post.objects.filter(pk__in=params['post_ids']).exclude(
+        group_id=params['group_id']
+    )
+
+
+def move_posts(params, ids):
+    posts = Post.objects.filter(pk__in=ids)
+    rows = list(posts.values_list('author_id', 'group_id'))
+    posts.update(group_id=params['group_id'])
+    search.get_backend().index(posts)
+    scopes = post_scopes(rows, ids)
+    scopes.add(cache.group_scope(params['group_id']))
+    return scopes
+
+
+def authors_comments(params):
+    return Comment.objects.filter(
+        author_id__in=params['author_ids'],
+        created__gte=parse_datetime(params['since']),
+    )
+
+
+def delete_comments(params, ids):
+    post_ids = set(
+        Comment.objects.filter(pk__in=ids).values_list('post_id', flat=True)
+    )
+    delete_rows(Comment, ids)
+    counters.reconcile_posts(Post.objects.filter(pk__in=post_ids))
+    scopes = {cache.post_scope(pk) for pk in post_ids}
+    scopes.add(cache.COMMENTS)
+    return scopes
+
+
+RUNNERS = {
+    ModerationJob.DELETE_AUTHORS_POSTS: (authors_posts, delete_posts),
+    ModerationJob.MOVE_TO_GROUP: (posts_outside_group, move_posts),
+    ModerationJob.PURGE_COMMENTS: (authors_comments, delete_comments),
+}
+
+
+def claim(job_id):
+    """Забирает задачу из очереди; False, если её уже взял другой."""
+    return bool(ModerationJob.objects.filter(
+        pk=job_id, status=ModerationJob.PENDING
+    ).update(status=ModerationJob.RUNNING, updated=timezone.now()))
+
+
+def run_chunk(job, targets, apply):
+    """Обрабатывает следующую пачку; возвращает её размер."""
+    with transaction.atomic():
+        ids = list(targets.order_by('pk').values_list(
+            'pk', flat=True
+        )[:MODERATION_CHUNK_SIZE])
+        if not ids:
+            return 0
+        scopes = apply(job.params, ids)
+        ModerationJob.objects.filter(pk=job.pk).update(
+            processed=F('processed') + len(ids), updated=timezone.now()
+        )
+    cache.bump(*scopes)
+    return len(ids)
+
+
+def process(job_id):
+    """Выполняет задачу целиком, обновляя прогресс после каждой пачки."""
+    if not claim(job_id):
+        return False
+    job = ModerationJob.objects.get(pk=job_id)
+    get_targets, apply = RUNNERS[job.action]
+    targets = get_targets(job.params)
+    ModerationJob.objects.filter(pk=job_id).update(
+        total=job.processed + targets.count()
+    )
+    try:
+        while run_chunk(job, targets, apply):
+            pass
+    except Exception as error:
+        ModerationJob.objects.filter(pk=job_id).update(
+            status=ModerationJob.FAILED,
+            error=repr(error),
+            updated=timezone.now(),
+        )
+        return False
+    ModerationJob.objects.filter(pk=job_id).update(
+        status=ModerationJob.DONE, error='', updated=timezone.now()
+    )
+    return True
+
+
+def requeue_stuck():
+    """Возвращает в очередь задачи, зависшие в RUNNING после падения."""
+    return ModerationJob.objects.filter(
+        status=ModerationJob.RUNNING,
+        updated__lt=timezone.now() - RUNNING_TIMEOUT,
+    ).update(status=ModerationJob.PENDING)
+
+
+def pending_jobs():
+    return list(ModerationJob.objects.filter(
+        status=ModerationJob.PENDING
+    ).order_by('created').values_list('pk', flat=True))
@@ -0,0 +1,122 @@
+"""Дайджесты уведомлений по электронной почте.
+
+Обработчики событий outbox сохраняют уведомления: подписчикам — о
+новых постах автора, автору — о комментариях и новых подписчиках.
+send_digests собирает все уведомления пользователя в одно письмо, когда
+самому старому из них исполняется POSTS_DIGEST_INTERVAL секунд, поэтому
+пользователь получает не больше одного письма за интервал. Письма
+уходят через EMAIL_BACKEND, то есть в очередь почты.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .constants import DIGEST_BATCH_SIZE, TIMELINE_BATCH_SIZE
+from .models import Follow, Notification, OutboxEvent
+
+DIGEST_SUBJECT = 'Новое в Yatube'
+DIGEST_TEMPLATE = 'posts/email/digest.txt'
+SECTIONS = {
+    OutboxEvent.POST_CREATED: 'posts',
+    OutboxEvent.COMMENT_CREATED: 'comments',
+    OutboxEvent.FOLLOW_CREATED: 'followers',
+}
+
+
+def absolute_url(viewname, *args):
+    return settings.SITE_URL.rstrip('/') + reverse(viewname, args=args)
+
+
+def notify(user, kind, data):
+    if user.email:
+        Notification.objects.create(user=user, kind=kind, data=data)
+
+
+def notify_followers(post):
+    data = {
+        'author': post.author.username,
+        'text': post.text,
+        'url': absolute_url('posts:post_detail', post.pk),
+    }
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).exclude(user__email='').values_list('user', flat=True)
+    Notification.objects.bulk_create(
+        (
+            Notification(
+                user_id=user_id, kind=OutboxEvent.POST_CREATED, data=data
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=TIMELINE_BATCH_SIZE,
+    )
+
+
+def notify_comment(comment):
+    if comment.author_id == comment.post.author_id:
+        return
+    notify(comment.post.author, OutboxEvent.COMMENT_CREATED, {
+        'author': comment.author.username,
+        'text': comment.text,
+        'url': absolute_url('posts:post_detail', comment.post_id),
+    })
+
+
+def notify_follow(follow):
+    notify(follow.author, OutboxEvent.FOLLOW_CREATED, {
+        'author': follow.user.username,
+        'url': absolute_url('posts:profile', follow.user.username),
+    })
+
+
+def due_users(limit):
+    cutoff = timezone.now() - datetime.timedelta(
+        seconds=settings.POSTS_DIGEST_INTERVAL
+    )
+    return list(Notification.objects.values('user').annotate(
+        first=Min('created')
+    ).filter(first__lte=cutoff).order_by().values_list(
+        'user', flat=True
+    )[:limit])
+
+
+def digest_message(user, notifications):
+    sections = defaultdict(list)
+    for notification in notifications:
+        sections[SECTIONS[notification.kind]].append(notification.data)
+    body = render_to_string(DIGEST_TEMPLATE, {'user': user, **sections})
+    return DIGEST_SUBJECT, body, settings.DEFAULT_FROM_EMAIL, [user.email]
+
+
+def send_digests(limit=DIGEST_BATCH_SIZE):
+    """Отправляет дайджесты, которым подошёл срок; возвращает число
+    писем. Уведомления, пришедшие во время сборки, ждут следующего
+    дайджеста."""
+    with transaction.atomic():
+        user_ids = due_users(limit)
+        if not user_ids:
+            return 0
+        notifications = Notification.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).filter(user__in=user_ids).select_related('user').order_by('pk')
+        by_user = defaultdict(list)
+        for notification in notifications:
+            by_user[notification.user_id].append(notification)
+        if not by_user:
+            return 0
+        last = max(items[-1].pk for items in by_user.values())
+        Notification.objects.filter(
+            user__in=list(by_user), pk__lte=last
+        ).delete()
+        return send_mass_mail([
+            digest_message(items[0].user, items)
+            for items in by_user.values()
+            if items[0].user.email
+        ])
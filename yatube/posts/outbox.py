@@ -0,0 +1,119 @@
+"""Очередь событий (transactional outbox) для фоновой обработки.
+
+Сигналы записывают событие в таблицу OutboxEvent в той же транзакции,
+что и пост, комментарий или подписку, поэтому запрос делает одну
+вставку, а событие не теряется при откате и не появляется без данных.
+Раскладку постов по лентам, заполнение ленты после подписки и
+уведомления для дайджестов выполняет команда process_outbox, забирая
+события пачками. При POSTS_OUTBOX_EAGER событие обрабатывается сразу
+в запросе — так удобно разрабатывать без воркера.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from . import cache, notifications, timeline
+from .constants import OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from .models import Comment, Follow, OutboxEvent, Post
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def record(kind, object_id):
+    """Записывает событие. Вызывается из post_save, поэтому запись
+    объекта должна идти внутри transaction.atomic(): иначе событие
+    окажется в отдельной транзакции и может потеряться."""
+    event = OutboxEvent.objects.create(kind=kind, object_id=object_id)
+    if settings.POSTS_OUTBOX_EAGER:
+        deliver([event])
+    return event
+
+
+@handler(OutboxEvent.POST_CREATED)
+def post_created(event):
+    try:
+        post = Post.objects.select_related('author').get(pk=event.object_id)
+    except Post.DoesNotExist:
+        return
+    followers = timeline.fan_out(post)
+    cache.bump(*[cache.follow_scope(user_id) for user_id in followers])
+    notifications.notify_followers(post)
+
+
+@handler(OutboxEvent.COMMENT_CREATED)
+def comment_created(event):
+    try:
+        comment = Comment.objects.select_related(
+            'author', 'post__author'
+        ).get(pk=event.object_id)
+    except Comment.DoesNotExist:
+        return
+    notifications.notify_comment(comment)
+
+
+@handler(OutboxEvent.FOLLOW_CREATED)
+def follow_created(event):
+    # Если подписку уже отменили, заполнять ленту нельзя: отписка
+    # очистила её раньше, чем до события дошла очередь.
+    try:
+        follow = Follow.objects.select_related(
+            'user', 'author'
+        ).get(pk=event.object_id)
+    except Follow.DoesNotExist:
+        return
+    timeline.backfill(follow.user_id, follow.author_id)
+    cache.bump(cache.follow_scope(follow.user_id))
+    notifications.notify_follow(follow)
+
+
+def fail(event, error):
+    OutboxEvent.objects.filter(pk=event.pk).update(
+        status=(
+            OutboxEvent.FAILED
+            if event.attempts + 1 >= OUTBOX_MAX_ATTEMPTS
+            else OutboxEvent.PENDING
+        ),
+        attempts=F('attempts') + 1,
+        error=repr(error),
+    )
+
+
+def deliver(events):
+    """Обрабатывает события; возвращает число обработанных.
+
+    Обработанные события удаляются. Упавшее событие откатывается к
+    точке сохранения и остаётся в очереди до OUTBOX_MAX_ATTEMPTS
+    попыток.
+    """
+    done = []
+    for event in events:
+        try:
+            with transaction.atomic():
+                HANDLERS[event.kind](event)
+        except Exception as error:
+            fail(event, error)
+        else:
+            done.append(event.pk)
+    OutboxEvent.objects.filter(pk__in=done).delete()
+    return len(done)
+
+
+def process(batch_size=OUTBOX_BATCH_SIZE):
+    """Обрабатывает пачку событий по порядку записи.
+
+    Возвращает (взято, обработано). На PostgreSQL строки пачки
+    заблокированы до конца транзакции, и параллельные воркеры берут
+    следующие события.
+    """
+    with transaction.atomic():
+        events = list(OutboxEvent.objects.select_for_update(
+            skip_locked=True
+        ).filter(status=OutboxEvent.PENDING).order_by('pk')[:batch_size])
+        return len(events), deliver(events)
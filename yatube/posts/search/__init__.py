@@ -0,0 +1,51 @@
+"""Полнотекстовый поиск по постам.
+
+Бэкенд выбирается по базе данных: SQLite — таблица FTS5 с основами
+слов, PostgreSQL — tsvector со словарём russian. Другой бэкенд можно
+указать в settings.POSTS_SEARCH_BACKEND.
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from ..models import Post
+from ..utils import CursorPaginator
+from .backends import PostgresBackend, SQLiteBackend
+
+
+def get_backend(db_connection=connection):
+    if settings.POSTS_SEARCH_BACKEND:
+        return import_string(settings.POSTS_SEARCH_BACKEND)()
+    if db_connection.vendor == 'postgresql':
+        return PostgresBackend()
+    return SQLiteBackend()
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная пагинация выдачи, упорядоченной по (ранг, id)."""
+
+    def __init__(self, query, per_page, author_id=None, group_id=None):
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.query = query
+        self.filters = {'author_id': author_id, 'group_id': group_id}
+        self.backend = get_backend()
+
+    def fetch(self, values, backwards=False):
+        rows = self.backend.search(
+            self.query, self.filters, values, backwards, self.per_page + 1
+        )
+        posts = self.queryset.in_bulk([pk for _, pk in rows])
+        found = []
+        for score, pk in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.search_rank = score
+                found.append(post)
+        return found
+
+    def cursor_values(self, obj):
+        return [obj.search_rank, obj.pk]
+
+    def parse_values(self, raw_values):
+        score, pk = raw_values
+        return [float(score), int(pk)]
@@ -0,0 +1,159 @@
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from ..models import Post
+from ..stemmer import stem_text
+
+FTS_TABLE = 'posts_post_fts'
+
+
+class SQLiteBackend:
+    """Индекс FTS5, в котором хранятся основы слов текста поста.
+
+    unicode61 не умеет русскую морфологию, поэтому текст и запрос
+    приводятся к основам стеммером до записи и поиска. Ранг — bm25,
+    чем он меньше, тем выше пост в выдаче.
+    """
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            'body, author_id UNINDEXED, group_id UNINDEXED, '
+            "tokenize = 'unicode61')"
+        )
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index(self, posts):
+        rows = [
+            (post.pk, stem_text(post.text), post.author_id, post.group_id)
+            for post in posts
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(row[0],) for row in rows]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} '
+                '(rowid, body, author_id, group_id) VALUES (%s, %s, %s, %s)',
+                rows
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in post_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def match(self, query):
+        terms = stem_text(query).split()
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def filter(self, queryset, query):
+        """Посты выборки, подходящие под запрос, без ранжирования."""
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        ))
+
+    def search(self, query, filters, after, backwards, limit):
+        """Список (ранг, id поста) в порядке выдачи."""
+        match = self.match(query)
+        if not match:
+            return []
+        where, params = [], [match]
+        for column in ('author_id', 'group_id'):
+            if filters.get(column) is not None:
+                where.append(f'{column} = %s')
+                params.append(filters[column])
+        if after is not None:
+            where.append(
+                '(score, id) < (%s, %s)' if backwards
+                else '(score, id) > (%s, %s)'
+            )
+            params.extend(after)
+        order = 'DESC' if backwards else 'ASC'
+        sql = (
+            'SELECT score, id FROM ('
+            f'SELECT rowid AS id, bm25({FTS_TABLE}) AS score, '
+            f'author_id, group_id FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+            + (' WHERE ' + ' AND '.join(where) if where else '')
+            + f' ORDER BY score {order}, id {order} LIMIT %s'
+        )
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class PostgresBackend:
+    """Поиск по tsvector со словарём russian.
+
+    Индекс GIN по выражению to_tsvector обновляется самой базой, поэтому
+    index() и remove() ничего не делают.
+    """
+    VECTOR = "to_tsvector('russian', posts_post.text)"
+    QUERY = "plainto_tsquery('russian', %s)"
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS posts_post_text_fts '
+            "ON posts_post USING gin (to_tsvector('russian', text))"
+        )
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute('DROP INDEX IF EXISTS posts_post_text_fts')
+
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def filter(self, queryset, query):
+        return queryset.filter(
+            RawSQL(
+                f'{self.VECTOR} @@ {self.QUERY}',
+                (query,),
+                output_field=BooleanField()
+            )
+        )
+
+    def search(self, query, filters, after, backwards, limit):
+        posts = self.filter(Post.objects.all(), query).annotate(
+            score=RawSQL(
+                f'-ts_rank_cd({self.VECTOR}, {self.QUERY})',
+                (query,),
+                output_field=FloatField()
+            )
+        )
+        posts = posts.filter(**{
+            column: value for column, value in filters.items()
+            if value is not None
+        })
+        if after is not None:
+            lookup = 'lt' if backwards else 'gt'
+            score, pk = after
+            posts = posts.filter(
+                Q(**{f'score__{lookup}': score})
+                | Q(score=score, **{f'pk__{lookup}': pk})
+            )
+        order = ('-score', '-pk') if backwards else ('score', 'pk')
+        return list(
+            posts.order_by(*order).values_list('score', 'pk')[:limit]
+        )
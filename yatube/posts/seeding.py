@@ -0,0 +1,273 @@
+"""Генерация больших синтетических наборов данных.
+
+Пользователи и группы создаются bulk_create, а массовые таблицы — сырым
+executemany пачками: без экземпляров моделей и сигналов на каждую
+строку вставка идёт в десятки раз быстрее. Поэтому после вставки
+finalize() одним проходом пересчитывает то, что обычно поддерживают
+сигналы: счётчики, ленты подписок и поисковый индекс. Популярность
+авторов и постов распределена по степенному закону: немногие авторы
+пишут и собирают подписчиков больше остальных, а показатели степени
+задают, насколько сильно. Генератор детерминирован: одинаковый seed
+даёт одинаковые данные, а даты отсчитываются от фиксированной EPOCH,
+а не от текущего времени.
+"""
+import collections
+import datetime
+import heapq
+import io
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from PIL import Image
+
+from . import counters, timeline
+from .constants import TIMELINE_LENGTH
+from .models import Comment, Follow, Group, Post, TimelineEntry, User
+
+PASSWORD = 'password'
+BATCH_SIZE = 5000
+EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+PERIOD = datetime.timedelta(days=365)
+IMAGE_SIZE = (960, 540)
+IMAGE_VARIANTS = 20
+WORDS = (
+    'кот собака дом лес река город утро вечер новости погода музыка книга '
+    'фильм дорога море солнце дождь снег друг работа отпуск поезд чай'
+).split()
+
+
+def next_number(queryset, field, prefix):
+    """Номер после наибольшего среди значений вида prefix<номер>.
+
+    Так новые имена не совпадут с оставшимися после удалений строками.
+    """
+    values = queryset.filter(
+        **{f'{field}__regex': rf'^{prefix}[0-9]+$'}
+    ).values_list(field, flat=True)
+    return max((int(value[len(prefix):]) for value in values), default=-1) + 1
+
+
+def zipf_weights(count, exponent=1.0):
+    """Накопленные веса степенного распределения для random.choices."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+class Generator:
+    """Генератор данных.
+
+    author_exponent — перекос числа постов по авторам, follower_exponent —
+    числа подписчиков, comment_exponent — комментариев по постам; 0 даёт
+    равномерное распределение. image_ratio — доля постов с картинкой.
+    """
+
+    def __init__(self, seed=0, batch_size=BATCH_SIZE, log=None,
+                 author_exponent=1.0, follower_exponent=1.0,
+                 comment_exponent=1.0, image_ratio=0.0):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.author_exponent = author_exponent
+        self.follower_exponent = follower_exponent
+        self.comment_exponent = comment_exponent
+        self.image_ratio = image_ratio
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def date(self):
+        return connection.ops.adapt_datetimefield_value(
+            EPOCH - PERIOD * self.random.random()
+        )
+
+    def insert(self, model, objects, total=None):
+        """Вставляет объекты из генератора пачками по batch_size."""
+        created = 0
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            created += len(batch)
+            self.log(f'{model.__name__}: {created}/{total or "?"}')
+
+    def insert_rows(self, model, fields, rows, total=None):
+        """Вставляет кортежи значений полей fields пачками по batch_size.
+
+        Значения должны быть уже подготовлены для базы.
+        """
+        quote = connection.ops.quote_name
+        columns = [model._meta.get_field(name).column for name in fields]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        created = 0
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            created += len(batch)
+            self.log(f'{model.__name__}: {created}/{total or "?"}')
+
+    def users(self, count):
+        password = make_password(PASSWORD)
+        start = next_number(User.objects, 'username', 'user')
+        self.insert(User, (
+            User(
+                username=f'user{start + number}',
+                first_name=self.random.choice(WORDS).capitalize(),
+                password=password,
+            )
+            for number in range(count)
+        ), count)
+
+    def groups(self, count):
+        start = next_number(Group.objects, 'slug', 'group-')
+        self.insert(Group, (
+            Group(
+                title=f'Группа {start + number}',
+                slug=f'group-{start + number}',
+                description=self.text(10),
+            )
+            for number in range(count)
+        ), count)
+
+    def images(self, count=IMAGE_VARIANTS):
+        """Несколько картинок, общих для всех постов: так посты с
+        картинками не требуют записи файла на каждую строку."""
+        names = []
+        for number in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            content = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(content, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/seed-{number}.jpg', ContentFile(content.getvalue())
+            ))
+        return names
+
+    def image(self, names):
+        if names and self.random.random() < self.image_ratio:
+            return self.random.choice(names)
+        return ''
+
+    def posts(self, count):
+        authors = list(User.objects.values_list('pk', flat=True))
+        groups = [None] + list(Group.objects.values_list('pk', flat=True))
+        weights = zipf_weights(len(authors), self.author_exponent)
+        images = self.images() if count and self.image_ratio else []
+        fields = (
+            'author', 'group', 'text', 'image', 'pub_date', 'comments_count'
+        )
+        self.insert_rows(Post, fields, (
+            (
+                self.random.choices(authors, cum_weights=weights)[0],
+                self.random.choice(groups),
+                self.text(self.random.randint(5, 60)),
+                self.image(images),
+                self.date(),
+                0,
+            )
+            for _ in range(count)
+        ), count)
+
+    def comments(self, count):
+        posts = list(Post.objects.values_list('pk', flat=True))
+        users = list(User.objects.values_list('pk', flat=True))
+        weights = zipf_weights(len(posts), self.comment_exponent)
+        self.insert_rows(Comment, ('post', 'author', 'text', 'created'), (
+            (
+                self.random.choices(posts, cum_weights=weights)[0],
+                self.random.choice(users),
+                self.text(self.random.randint(3, 20)),
+                self.date(),
+            )
+            for _ in range(count)
+        ), count)
+
+    def follows(self, count):
+        users = list(User.objects.values_list('pk', flat=True))
+        weights = zipf_weights(len(users), self.follower_exponent)
+        existing = set(Follow.objects.values_list('user', 'author'))
+        count = min(count, len(users) * (len(users) - 1) - len(existing))
+        self.insert_rows(Follow, ('user', 'author'), self.unique_follows(
+            users, weights, existing, count
+        ), count)
+
+    def unique_follows(self, users, weights, existing, count):
+        created = 0
+        while created < count:
+            user = self.random.choice(users)
+            author = self.random.choices(users, cum_weights=weights)[0]
+            if user == author or (user, author) in existing:
+                continue
+            existing.add((user, author))
+            created += 1
+            yield user, author
+
+    def timelines(self):
+        """Пересобирает все ленты за два прохода по таблицам.
+
+        timeline.rebuild() делает запросы на каждого пользователя; здесь
+        последние посты каждого автора читаются один раз, а ленты
+        собираются слиянием этих списков в памяти.
+        """
+        heavy = timeline.heavy_authors()
+        latest = collections.defaultdict(list)
+        posts = Post.objects.exclude(author__in=heavy).order_by(
+            'author', '-pub_date'
+        ).values_list('author', 'pub_date', 'pk')
+        for author, pub_date, pk in posts.iterator(self.batch_size):
+            entries = latest[author]
+            if len(entries) < TIMELINE_LENGTH:
+                entries.append((pub_date, pk))
+        follows = Follow.objects.exclude(author__in=heavy).order_by(
+            'user'
+        ).values_list('user', 'author')
+        adapt = connection.ops.adapt_datetimefield_value
+        TimelineEntry.objects.all().delete()
+        self.insert_rows(TimelineEntry, ('user', 'post', 'pub_date'), (
+            (user, pk, adapt(pub_date))
+            for user, authors in itertools.groupby(
+                follows.iterator(self.batch_size), key=lambda row: row[0]
+            )
+            for pub_date, pk in itertools.islice(heapq.merge(
+                *(latest[author] for _, author in authors), reverse=True
+            ), TIMELINE_LENGTH)
+        ))
+
+    def finalize(self):
+        """Пересчитывает то, что при обычной записи делают сигналы."""
+        self.log('Счётчики')
+        counters.reconcile_profiles()
+        counters.reconcile_posts()
+        self.log('Ленты подписок')
+        self.timelines()
+        self.log('Поисковый индекс')
+        call_command(
+            'rebuild_search_index',
+            batch_size=self.batch_size,
+            stdout=io.StringIO(),
+        )
+
+
+def generate(users=0, groups=0, posts=0, comments=0, follows=0, seed=0,
+             batch_size=BATCH_SIZE, log=None, **distribution):
+    generator = Generator(seed, batch_size, log, **distribution)
+    generator.users(users)
+    generator.groups(groups)
+    generator.posts(posts)
+    generator.comments(comments)
+    generator.follows(follows)
+    generator.finalize()
+    return generator
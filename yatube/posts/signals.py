@@ -0,0 +1,171 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, counters, outbox, search, timeline
+from .models import (ArchivedPost, Comment, Follow, Group, OutboxEvent, Post,
+                     Profile, User)
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.author_id, 1, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, -1, 'posts_count')
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.author_id, 1, 'followers_count')
+        counters.change_profile(instance.user_id, 1, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, -1, 'followers_count')
+    counters.change_profile(instance.user_id, -1, 'following_count')
+
+
+@receiver(post_save, sender=Post)
+def record_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        outbox.record(OutboxEvent.POST_CREATED, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        outbox.record(OutboxEvent.COMMENT_CREATED, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def record_follow(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        outbox.record(OutboxEvent.FOLLOW_CREATED, instance.pk)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    scopes = {
+        cache.FEED,
+        cache.author_scope(instance.author_id),
+        cache.post_scope(instance.pk),
+    }
+    for group_id in (
+        instance.group_id,
+        getattr(instance, '_previous_group_id', None),
+    ):
+        if group_id is not None:
+            scopes.add(cache.group_scope(group_id))
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    cache.bump(cache.post_scope(instance.post_id), cache.COMMENTS)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    # У подписчика в профиле меняется число подписок.
+    cache.bump(
+        cache.author_scope(instance.author_id),
+        cache.author_scope(instance.user_id),
+        cache.follow_scope(instance.user_id),
+    )
+
+
+def group_authors(group_id):
+    """Авторы постов группы, в том числе архивных: название группы
+    показывается в их профилях."""
+    authors = set()
+    for model in (Post, ArchivedPost):
+        authors.update(model.objects.filter(group_id=group_id).values_list(
+            'author_id', flat=True
+        ).distinct())
+    return authors
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    # После удаления у постов group_id уже NULL.
+    instance._author_ids = group_authors(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    author_ids = getattr(instance, '_author_ids', None)
+    if author_ids is None:
+        author_ids = group_authors(instance.pk)
+    cache.bump(
+        cache.FEED,
+        cache.group_scope(instance.pk),
+        *[cache.author_scope(author_id) for author_id in author_ids],
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, update_fields, **kwargs):
+    # Вход пользователя обновляет только last_login, ленты от него
+    # не меняются.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    # Имя автора показывается и в лентах групп, где есть его посты.
+    group_ids = Post.objects.filter(
+        author=instance, group__isnull=False
+    ).values_list('group_id', flat=True).distinct()
+    cache.bump(
+        cache.FEED,
+        cache.author_scope(instance.pk),
+        *[cache.group_scope(group_id) for group_id in group_ids],
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw, **kwargs):
+    if not raw:
+        search.get_backend().index([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove([instance.pk])
@@ -0,0 +1,74 @@
+"""Стеммер русского языка по алгоритму Snowball (Портера).
+
+Окончания ищутся только в области RV — части слова после первой
+гласной. Регулярные выражения перебираются слева направо, поэтому
+первым совпадает самое длинное окончание группы.
+"""
+import functools
+import re
+
+WORD = re.compile(r'\w+')
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+I_ENDING = re.compile(r'и$')
+SOFT_SIGN = re.compile(r'ь$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+def strip(pattern, word):
+    return pattern.sub('', word, count=1)
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    stemmed = strip(PERFECTIVE_GERUND, rv)
+    if stemmed == rv:
+        rv = strip(REFLEXIVE, rv)
+        stemmed = strip(ADJECTIVE, rv)
+        if stemmed != rv:
+            rv = strip(PARTICIPLE, stemmed)
+        else:
+            stemmed = strip(VERB, rv)
+            rv = strip(NOUN, rv) if stemmed == rv else stemmed
+    else:
+        rv = stemmed
+    rv = strip(I_ENDING, rv)
+    if DERIVATIONAL.match(rv):
+        rv = strip(DERIVATIONAL_ENDING, rv)
+    stemmed = strip(SOFT_SIGN, rv)
+    if stemmed == rv:
+        rv = DOUBLE_N.sub('н', strip(SUPERLATIVE, rv), count=1)
+    else:
+        rv = stemmed
+    return start + rv
+
+
+def stem_text(text):
+    """Текст как строка основ слов, разделённых пробелами."""
+    return ' '.join(stem(word) for word in WORD.findall(text))
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import estimated_count
+from ..models import Comment, Group, Post, User
+
+
+class AdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.test', password='secret'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.admin, group=cls.group, text='Коты гуляют по крышам'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        author = User.objects.create_user(username=f'author{count}')
+        group = Group.objects.create(title=f'Группа {count}', slug=count)
+        for i in range(count):
+            post = Post.objects.create(
+                author=author, group=group, text=f'Пост {i}'
+            )
+            Comment.objects.create(post=post, author=author, text='Ответ')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_query_per_row(self):
+        """Число запросов списка не зависит от числа строк"""
+        urls = (
+            reverse('admin:posts_post_changelist'),
+            reverse('admin:posts_comment_changelist'),
+        )
+        self.add_rows(2)
+        few = [self.count_queries(url) for url in urls]
+        self.add_rows(10)
+        for url, expected in zip(urls, few):
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), expected)
+
+    def test_search_uses_full_text_index(self):
+        """Поиск находит пост по другой форме слова"""
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [self.post])
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_estimated_count(self):
+        """Без фильтров большая таблица не пересчитывается"""
+        url = reverse('admin:posts_post_changelist')
+        with mock.patch(
+            'posts.admin.estimated_count', return_value=50000
+        ) as estimate:
+            response = self.client.get(url)
+            self.assertEqual(response.context['cl'].result_count, 50000)
+            estimate.assert_called_once()
+            response = self.client.get(url, {'q': 'кот'})
+            self.assertEqual(response.context['cl'].result_count, 1)
+            estimate.assert_called_once()
+
+    def test_small_table_counted_exactly(self):
+        self.assertEqual(estimated_count(Post), self.post.pk)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_count(Post), 1)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_autocomplete_widgets(self):
+        for name, args, fields in (
+            ('admin:posts_post_change', [self.post.pk], ('author', 'group')),
+            ('admin:posts_comment_add', [], ('post', 'author')),
+        ):
+            response = self.client.get(reverse(name, args=args))
+            form = response.context['adminform'].form
+            for field in fields:
+                with self.subTest(name=name, field=field):
+                    self.assertIsInstance(
+                        form.fields[field].widget.widget, AutocompleteSelect
+                    )
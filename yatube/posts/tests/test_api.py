@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_index(self):
+        """Лента отдаётся курсорными страницами"""
+        response = self.client.get(reverse('posts:api_index'), {'limit': 2})
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+        self.assertEqual(data['results'][0], {
+            'id': self.post.pk,
+            'text': self.post.text,
+            'pub_date': self.post.pub_date.isoformat(),
+            'author': 'author',
+            'group': 'group',
+            'image': None,
+            'comments_count': 1,
+        })
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_group_and_profile(self):
+        """Лента группы и профиль отдают описание и посты"""
+        data = self.client.get(
+            reverse('posts:api_group_posts', args=['group'])
+        ).json()
+        self.assertEqual(data['group']['title'], 'Группа')
+        self.assertEqual(len(data['results']), 3)
+        data = self.client.get(
+            reverse('posts:api_profile', args=['author'])
+        ).json()
+        self.assertEqual(data['author']['full_name'], 'Лев Толстой')
+        self.assertEqual(data['author']['posts_count'], 3)
+
+    def test_post_detail(self):
+        """Пост отдаётся с комментариями"""
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий']
+        )
+
+    def test_not_found(self):
+        """Несуществующие группа, автор и пост отдают 404"""
+        for url in (
+            reverse('posts:api_group_posts', args=['missing']),
+            reverse('posts:api_profile', args=['missing']),
+            reverse('posts:api_post_detail', args=[0]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304 до изменения данных"""
+        url = reverse('posts:api_post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_feed_etag_changes_with_new_post(self):
+        """Новый пост меняет ETag ленты"""
+        url = reverse('posts:api_index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(author=self.author, text='Ещё пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_read_only(self):
+        """API принимает только безопасные методы"""
+        response = self.client.post(reverse('posts:api_index'))
+        self.assertEqual(
+            response.status_code, HTTPStatus.METHOD_NOT_ALLOWED
+        )
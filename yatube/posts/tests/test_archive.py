@@ -0,0 +1,136 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, search
+from ..counters import reconcile_profiles
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group, Post,
+                      Profile, User)
+
+
+@override_settings(POSTS_ARCHIVE_AFTER_DAYS=365)
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        now = timezone.now()
+        cls.posts = []
+        for i in range(15):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            days = 500 - i if i < 12 else 15 - i
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - datetime.timedelta(days=days)
+            )
+            cls.posts.append(post)
+        cls.old = cls.posts[0]
+        Comment.objects.create(post=cls.old, author=cls.reader, text='Ответ')
+        # От новых к старым, как в профиле.
+        cls.expected = [post.pk for post in reversed(cls.posts)]
+
+    def setUp(self):
+        cache.clear()
+
+    def move(self):
+        return archive.archive(archive.cutoff(), batch_size=5)
+
+    def test_old_posts_moved(self):
+        """Старые посты переносятся вместе с комментариями"""
+        self.assertEqual(self.move(), 12)
+        self.assertEqual(Post.objects.count(), 3)
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(
+            (archived.text, archived.author, archived.group),
+            (self.old.text, self.author, self.group),
+        )
+        self.assertEqual(archived.comments_count, 1)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            list(archived.comments.values_list('text', flat=True)), ['Ответ']
+        )
+        found = search.get_backend().search('пост', {}, None, False, 20)
+        self.assertEqual(len(found), 3)
+        reconcile_profiles([self.author.pk])
+        self.assertEqual(
+            Profile.objects.get(user=self.author).posts_count, 15
+        )
+        self.assertEqual(self.move(), 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_posts', batch_size=5, stdout=out)
+        self.assertIn('12 постов', out.getvalue())
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+
+    def test_post_detail_reads_archive(self):
+        """Архивный пост открывается по прежнему адресу только для чтения"""
+        self.move()
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk])
+        )
+        self.assertTrue(response.context['post'].is_archived)
+        self.assertContains(response, self.old.text)
+        self.assertContains(response, 'Ответ')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[self.old.pk])
+        )
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.old.pk]), {'text': 'Ещё'}
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=[self.old.pk])
+        )
+        self.assertEqual(response.json()['comments'][0]['text'], 'Ответ')
+
+    def test_profile_pages_span_archive(self):
+        """Профиль листается от новых постов к архивным"""
+        self.move()
+        url = reverse('posts:profile', args=[self.author.username])
+        pages = [
+            self.client.get(url, {'page': page}).context['page_obj']
+            for page in (1, 2)
+        ]
+        self.assertEqual(pages[0].paginator.count, 15)
+        self.assertEqual(
+            [post.pk for page in pages for post in page], self.expected
+        )
+        self.assertNotIn(
+            self.old.text,
+            self.client.get(reverse('posts:index')).content.decode(),
+        )
+
+    def test_api_cursor_pages_span_archive(self):
+        self.move()
+        url = reverse('posts:api_profile', args=[self.author.username])
+        data = self.client.get(url, {'limit': 4}).json()
+        ids = [post['id'] for post in data['results']]
+        while data['next']:
+            previous = data
+            data = self.client.get(data['next']).json()
+            ids += [post['id'] for post in data['results']]
+        self.assertEqual(ids, self.expected)
+        back = self.client.get(data['previous']).json()
+        self.assertEqual(back['results'], previous['results'])
+
+    def test_chained_slices(self):
+        self.move()
+        posts = archive.author_posts(self.author)
+        for start, stop in ((0, 2), (2, 5), (4, 9), (13, 20), (20, 25)):
+            with self.subTest(start=start, stop=stop):
+                self.assertEqual(
+                    [post.pk for post in posts[start:stop]],
+                    self.expected[start:stop],
+                )
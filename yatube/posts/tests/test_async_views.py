@@ -0,0 +1,179 @@
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import (AsyncClient, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from yatube import urls as project_urls
+
+from .. import archive, async_views
+from .. import urls as posts_urls
+from ..models import Comment, Follow, Group, Post, User
+
+# URL проекта, как под ASGI: асинхронные ленты стоят перед обычными.
+urlpatterns = [
+    path('', include(([
+        path('', async_views.index, name='index'),
+        path(
+            'group/<slug:slug>/', async_views.group_posts, name='group_list'
+        ),
+        path(
+            'profile/<str:username>/', async_views.profile, name='profile'
+        ),
+        path(
+            'posts/<int:post_id>/',
+            async_views.post_detail,
+            name='post_detail'
+        ),
+        path('follow/', async_views.follow_index, name='follow_index'),
+        *posts_urls.urlpatterns,
+    ], 'posts'))),
+    *project_urls.urlpatterns[1:],
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    POSTS_ASYNC_PARALLEL_QUERIES=False,
+    POSTS_OUTBOX_EAGER=True,
+)
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        for text in ('Первый', 'Второй'):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=text
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.async_client.force_login(self.reader)
+
+    async def test_pages(self):
+        """Асинхронные страницы показывают те же посты"""
+        for url, template in (
+            (reverse('posts:index'), 'posts/index.html'),
+            (reverse('posts:group_list', args=['group']),
+             'posts/group_list.html'),
+            (reverse('posts:profile', args=['author']),
+             'posts/profile.html'),
+            (reverse('posts:follow_index'), 'posts/follow.html'),
+        ):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTemplateUsed(response, template)
+                self.assertEqual(
+                    list(response.context['page_obj']), [self.post]
+                )
+
+    async def test_profile_context(self):
+        response = await self.async_client.get(
+            reverse('posts:profile', args=['author'])
+        )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['profile'].posts_count, 1)
+
+    async def test_post_detail(self):
+        """Комментарии загружаются одновременно с постом"""
+        response = await self.async_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['post_count'], 1)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Первый', 'Второй'],
+        )
+
+    async def test_archived_post_detail(self):
+        await sync_to_async(archive.archive)(timezone.now())
+        response = await self.async_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertTrue(response.context['post'].is_archived)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Первый', 'Второй'],
+        )
+
+    async def test_not_found(self):
+        for url in (
+            reverse('posts:post_detail', args=[self.post.pk + 1]),
+            reverse('posts:profile', args=['nobody']),
+            reverse('posts:group_list', args=['nothing']),
+        ):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_follow_index_requires_login(self):
+        response = await AsyncClient().get(reverse('posts:follow_index'))
+        self.assertRedirects(
+            response,
+            reverse('users:login') + '?next=' + reverse('posts:follow_index'),
+            fetch_redirect_response=False,
+        )
+
+    async def test_not_modified(self):
+        """Условные запросы работают и для асинхронных страниц"""
+        url = reverse('posts:index')
+        response = await self.async_client.get(url)
+        # AsyncClient в Django 3.2 передаёт extra как заголовки ASGI.
+        response = await self.async_client.get(
+            url, **{'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    async def test_index_cached(self):
+        """Главная асинхронно берётся из кэша страниц"""
+        url = reverse('posts:index')
+        await self.async_client.get(url)
+        # update() не вызывает сигналы, поэтому версия кэша не меняется.
+        await sync_to_async(
+            Post.objects.filter(pk=self.post.pk).update
+        )(text='Новый текст')
+        response = await self.async_client.get(url)
+        self.assertNotContains(response, 'Новый текст')
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    POSTS_ASYNC_PARALLEL_QUERIES=True,
+    INSTRUMENTATION_SAMPLE_RATE=1,
+    INSTRUMENTATION_SERVER_TIMING=True,
+)
+class ParallelQueriesTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=author, text='Пост')
+        Follow.objects.create(user=reader, author=author)
+        self.client = AsyncClient()
+        self.client.force_login(reader)
+
+    async def test_profile(self):
+        """Запросы в отдельных потоках видны замерам запроса"""
+        response = await self.client.get(
+            reverse('posts:profile', args=['author'])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertRegex(
+            response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* '
+        )
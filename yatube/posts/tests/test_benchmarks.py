@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase
+
+from .. import benchmarks, seeding
+from ..benchmarks import plans
+from ..management.commands.benchmark import BASELINE
+from ..models import Comment, Follow, Group, Post, Profile, User
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seeding.generate(
+            users=20, groups=3, posts=100, comments=50, follows=40, seed=1
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_data(self):
+        """Генератор создаёт данные и пересчитывает счётчики"""
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertEqual(Follow.objects.count(), 40)
+        author = Profile.objects.order_by('-posts_count').first()
+        self.assertEqual(
+            author.posts_count, Post.objects.filter(author=author.user).count()
+        )
+
+    def test_measure(self):
+        """Замер сценария возвращает перцентили и число запросов"""
+        fixtures = benchmarks.get_fixtures()
+        client = Client()
+        client.force_login(fixtures.reader)
+        for scenario in benchmarks.SCENARIOS:
+            with self.subTest(scenario=scenario.name):
+                result = benchmarks.measure(scenario, client, fixtures, 3)
+                self.assertLessEqual(result['p50'], result['max'])
+                self.assertGreater(result['queries'], 0)
+
+    def test_compare(self):
+        """Регрессия — рост числа запросов; время только предупреждает"""
+        base = {'p50': 10, 'p90': 20, 'queries': 4}
+        slower = {'index': {'p50': 16, 'p90': 40, 'queries': 4}}
+        self.assertEqual(benchmarks.compare(slower, {'index': base}), [])
+        self.assertEqual(
+            len(benchmarks.slowdowns(slower, {'index': base}, 0.5)), 1
+        )
+        self.assertEqual(benchmarks.slowdowns(
+            {'index': {'p50': 14, 'p90': 40, 'queries': 4}},
+            {'index': base}, 0.5,
+        ), [])
+        self.assertEqual(len(benchmarks.compare(
+            {'index': {'p50': 10, 'p90': 20, 'queries': 5}},
+            {'index': base},
+        )), 1)
+        self.assertEqual(benchmarks.compare(
+            {'group_posts': {'p50': 1, 'p90': 1, 'queries': 1}},
+            {'index': base},
+        ), ['group_posts: нет в базовой линии'])
+
+    def test_baseline_covers_scenarios(self):
+        """У каждого сценария есть базовая линия"""
+        baseline = benchmarks.load_baseline(BASELINE)
+        self.assertEqual(
+            sorted(baseline),
+            sorted(scenario.name for scenario in benchmarks.SCENARIOS),
+        )
+
+    def test_plans_use_indexes(self):
+        """Запросы сценариев не просматривают таблицы целиком"""
+        fixtures = benchmarks.get_fixtures()
+        client = Client()
+        client.force_login(fixtures.reader)
+        for scenario in benchmarks.SCENARIOS:
+            with self.subTest(scenario=scenario.name):
+                scenario_plans = plans.scenario_plans(
+                    scenario, client, fixtures
+                )
+                self.assertTrue(scenario_plans)
+                for plan in scenario_plans:
+                    self.assertEqual(plan.problems, [], plan.sql)
+
+    def test_full_scan_detected(self):
+        plan = plans.analyze(
+            'SELECT id FROM posts_post WHERE text = %s', ['текст']
+        )
+        self.assertTrue(plan.problems)
+
+    def test_unique_follow(self):
+        """Повторная подписка на того же автора не сохраняется"""
+        follow = Follow.objects.first()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=follow.user, author=follow.author)
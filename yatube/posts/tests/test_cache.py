@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from .. import cache as posts_cache
+
+
+class CachedPageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @posts_cache.cached_page(60, 600, (posts_cache.FEED,))
+        def view(request):
+            self.calls += 1
+            return HttpResponse(f'render {self.calls}')
+
+        self.view = view
+
+    def view_request(self, path='/'):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        return request
+
+    def get(self, path='/'):
+        return self.view(self.view_request(path)).content.decode()
+
+    def test_fresh_page_from_cache(self):
+        """Свежая страница отдаётся из кэша без рендера"""
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get(), 'render 1')
+        self.assertEqual(self.get('/?page=2'), 'render 2')
+
+    def test_bump_recomputes_once(self):
+        """После смены версии страницу пересчитывает один запрос"""
+        self.get()
+        posts_cache.bump(posts_cache.FEED)
+        self.assertEqual(self.get(), 'render 2')
+        self.assertEqual(self.get(), 'render 2')
+
+    def test_stale_while_locked(self):
+        """Пока страницу пересчитывают, отдаётся устаревшая копия"""
+        self.get()
+        posts_cache.bump(posts_cache.FEED)
+        key = posts_cache.page_key(self.view, self.view_request())
+        lock_key = f'{key}:lock'
+        cache.add(lock_key, True)
+        response = self.view(self.view_request())
+        self.assertEqual(response.content.decode(), 'render 1')
+        self.assertTrue(response.is_stale)
+        self.assertEqual(self.calls, 1)
+
+    def test_soft_timeout(self):
+        """После мягкого срока страница пересчитывается"""
+        self.get()
+        with mock.patch('posts.cache.time.time', return_value=10 ** 12):
+            self.assertEqual(self.get(), 'render 2')
+
+    def test_early_refresh(self):
+        """Долгий рендер около срока запускает раннее обновление"""
+        self.get()
+        key = posts_cache.page_key(self.view, self.view_request())
+        entry = cache.get(key)
+        entry['delta'] = 3600
+        cache.set(key, entry)
+        with mock.patch('posts.cache.random.random', return_value=0.999):
+            self.assertEqual(self.get(), 'render 2')
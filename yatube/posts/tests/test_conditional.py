@@ -0,0 +1,187 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(
+            username='reader', password='password'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def revalidate(self, url, etag, client=None):
+        client = client or self.client
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        """Страницы без изменений отвечают 304"""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.revalidate(url, response['ETag'])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_etag_depends_on_user(self):
+        """ETag страницы у разных пользователей разный"""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        response = self.revalidate(url, etag, Client())
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_csrf_rotation_changes_post_detail(self):
+        """После повторного входа страница поста приходит с новым токеном"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = client.get(url)['ETag']
+        client.logout()
+        client.login(username='reader', password='password')
+        response = self.revalidate(url, etag, client)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        token = response.context['csrf_token']
+        response = client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_new_comment_changes_post_detail(self):
+        """Новый комментарий меняет ETag поста"""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Комментарий')
+
+    def test_comment_changes_api_feeds(self):
+        """Комментарий меняет ETag лент API с числом комментариев"""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_posts', args=['group']),
+            reverse('posts:api_profile', args=['author']),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        for delete in (False, True):
+            if delete:
+                comment.delete()
+            for url in urls:
+                with self.subTest(url=url, delete=delete):
+                    response = self.revalidate(url, etags[url])
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertEqual(
+                        response.json()['results'][0]['comments_count'],
+                        0 if delete else 1,
+                    )
+                    etags[url] = response['ETag']
+
+    def test_comment_keeps_html_feeds(self):
+        """Комментарий не меняет ETag HTML-лент"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url, etags[url])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_other_posts_keep_group_and_profile(self):
+        """Чужой пост вне группы не меняет ETag группы и профиля"""
+        urls = (
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Post.objects.create(author=self.reader, text='Другой пост')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.revalidate(url, etags[url])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_names_change_group_and_profile(self):
+        """Новое имя автора и группы меняет ETag страниц, где они видны"""
+        for url, change in (
+            (reverse('posts:group_list', args=['group']),
+             lambda: User.objects.get(pk=self.author.pk).save()),
+            (reverse('posts:profile', args=['author']),
+             lambda: Group.objects.get(pk=self.group.pk).save()),
+        ):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_group_delete_changes_profile(self):
+        url = reverse('posts:profile', args=['author'])
+        etag = self.client.get(url)['ETag']
+        Group.objects.filter(pk=self.group.pk).delete()
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, 'Группа')
+
+    def test_follow_changes_profile(self):
+        """Подписка меняет ETag профиля автора"""
+        url = reverse('posts:profile', args=['author'])
+        etag = self.client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_follower_profile(self):
+        """Подписка и отписка меняют ETag профиля подписчика"""
+        for url in (
+            reverse('posts:profile', args=['reader']),
+            reverse('posts:api_profile', args=['reader']),
+        ):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                Follow.objects.create(user=self.reader, author=self.author)
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                etag = response['ETag']
+                Follow.objects.filter(user=self.reader).delete()
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
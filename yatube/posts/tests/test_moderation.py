@@ -0,0 +1,157 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import cache as posts_cache
+from .. import moderation, search
+from ..models import (Comment, Follow, Group, ModerationJob, Post,
+                      Profile, TimelineEntry, User)
+
+
+@override_settings(POSTS_MODERATION_WORKERS=0)
+class ModerationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.test', password='secret'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.author, author=cls.spammer)
+        cls.spam = [
+            Post.objects.create(author=cls.spammer, text=f'Реклама {i}')
+            for i in range(5)
+        ]
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for post in (cls.spam[0], cls.post):
+            Comment.objects.create(post=post, author=cls.spammer, text='Спам')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def run_action(self, model, action, selected, **data):
+        url = reverse(f'admin:posts_{model}_changelist')
+        post = {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [obj.pk for obj in selected],
+        }
+        response = self.client.post(url, post)
+        self.assertTemplateUsed(response, 'admin/posts/moderation_action.html')
+        response = self.client.post(url, {**post, 'apply': 1, **data})
+        self.assertRedirects(response, url)
+        return ModerationJob.objects.get()
+
+    def search(self, query):
+        return search.get_backend().filter(Post.objects.all(), query)
+
+    @mock.patch('posts.moderation.MODERATION_CHUNK_SIZE', 2)
+    def test_delete_authors_posts(self):
+        """Посты автора удаляются пачками со всеми зависимыми строками"""
+        job = self.run_action('post', 'delete_authors_posts', self.spam[:1])
+        self.assertEqual(job.status, ModerationJob.PENDING)
+        self.assertEqual(job.params, {'author_ids': [self.spammer.pk]})
+        with mock.patch(
+            'posts.moderation.cache.bump', wraps=posts_cache.bump
+        ) as bump:
+            self.assertTrue(moderation.process(job.pk))
+        self.assertEqual(bump.call_count, 3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual((job.processed, job.total), (5, 5))
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(
+            Comment.objects.filter(post__in=self.spam).count(), 0
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__author=self.spammer
+        ).exists())
+        self.assertFalse(self.search('реклама').exists())
+        self.assertEqual(
+            Profile.objects.get(user=self.spammer).posts_count, 0
+        )
+
+    def test_move_to_group(self):
+        """Перенос в группу обновляет поиск и версии кэша"""
+        version = posts_cache.get_version(
+            posts_cache.group_scope(self.group.pk)
+        )
+        job = self.run_action(
+            'post', 'move_to_group', self.spam[:2], group=self.group.pk
+        )
+        moderation.process(job.pk)
+        self.assertEqual(set(self.group.posts.all()), set(self.spam[:2]))
+        self.assertNotEqual(
+            posts_cache.get_version(posts_cache.group_scope(self.group.pk)),
+            version,
+        )
+        found = search.get_backend().search(
+            'реклама', {'group_id': self.group.pk}, None, False, 10
+        )
+        self.assertEqual(len(found), 2)
+
+    def test_purge_comments_since(self):
+        """Удаляются только комментарии автора начиная с даты"""
+        old = Comment.objects.create(
+            post=self.post, author=self.spammer, text='Старый'
+        )
+        Comment.objects.filter(pk=old.pk).update(
+            created=timezone.now() - datetime.timedelta(days=7)
+        )
+        since = timezone.localtime() - datetime.timedelta(days=1)
+        job = self.run_action(
+            'comment',
+            'purge_comments',
+            Comment.objects.filter(text='Спам')[:1],
+            since=since.strftime('%Y-%m-%d %H:%M'),
+        )
+        moderation.process(job.pk)
+        self.assertEqual(list(Comment.objects.all()), [old])
+        self.post.refresh_from_db()
+        self.spam[0].refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.spam[0].comments_count, 0)
+
+    def test_failed_job(self):
+        job = moderation.enqueue(
+            ModerationJob.DELETE_AUTHORS_POSTS,
+            {'author_ids': [self.spammer.pk]},
+            self.admin,
+        )
+        with mock.patch.dict(moderation.RUNNERS, {
+            ModerationJob.DELETE_AUTHORS_POSTS: (
+                moderation.authors_posts,
+                mock.Mock(side_effect=RuntimeError('сбой')),
+            ),
+        }):
+            self.assertFalse(moderation.process(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.FAILED)
+        self.assertIn('сбой', job.error)
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 5)
+
+    def test_command_and_progress(self):
+        job = moderation.enqueue(
+            ModerationJob.DELETE_AUTHORS_POSTS,
+            {'author_ids': [self.spammer.pk]},
+            self.admin,
+        )
+        out = StringIO()
+        call_command('process_moderation', stdout=out)
+        self.assertIn('1/1', out.getvalue())
+        self.assertFalse(moderation.claim(job.pk))
+        response = self.client.get(
+            reverse('admin:posts_moderationjob_changelist')
+        )
+        self.assertContains(response, '5/5')
@@ -0,0 +1,188 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import notifications, outbox
+from ..constants import OUTBOX_MAX_ATTEMPTS
+from ..models import (Comment, Follow, Notification, OutboxEvent, Post,
+                      TimelineEntry, User)
+
+
+@override_settings(
+    POSTS_OUTBOX_EAGER=False,
+    POSTS_DIGEST_INTERVAL=0,
+    SITE_URL='http://yatube.test',
+)
+class OutboxTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@yatube.test'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@yatube.test'
+        )
+        cls.silent = User.objects.create_user(username='silent')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.silent, author=cls.author)
+        OutboxEvent.objects.all().delete()
+
+    def mailbox(self, email):
+        return [message for message in mail.outbox if email in message.to]
+
+    def test_request_only_records_event(self):
+        """Создание поста в запросе — одна вставка события"""
+        client = Client()
+        client.force_login(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            client.post(reverse('posts:post_create'), {'text': 'Пост'})
+        inserts = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('INSERT')
+        ]
+        self.assertEqual(len(inserts), 2)
+        self.assertIn('posts_outboxevent', inserts[1])
+        post = Post.objects.get(text='Пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_worker_fans_out_and_sends_digest(self):
+        """Воркер раскладывает посты, дайджест собирает их в одно письмо"""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        self.assertEqual(outbox.process(), (3, 3))
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(notifications.send_digests(), 1)
+        self.assertFalse(Notification.objects.exists())
+        messages = self.mailbox('reader@yatube.test')
+        self.assertEqual(len(messages), 1)
+        for post in posts:
+            with self.subTest(post=post.text):
+                self.assertIn(post.text, messages[0].body)
+        self.assertIn(
+            f'http://yatube.test/posts/{posts[0].pk}/', messages[0].body
+        )
+        # У подписчика без адреса писем нет, но лента заполнена.
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.silent).count(), 3
+        )
+
+    def test_comment_and_follow_notify_author(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        Comment.objects.create(post=post, author=self.author, text='Свой')
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        outbox.process()
+        notifications.send_digests()
+        messages = self.mailbox('author@yatube.test')
+        self.assertEqual(len(messages), 1)
+        self.assertIn('reader: Ответ', messages[0].body)
+        self.assertNotIn('Свой', messages[0].body)
+        self.assertIn('http://yatube.test/profile/fan/', messages[0].body)
+
+    def test_follow_backfill_skipped_after_unfollow(self):
+        """Отменённая до обработки подписка не заполняет ленту"""
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Пост')
+        Follow.objects.create(user=self.reader, author=other)
+        Follow.objects.filter(user=self.reader, author=other).delete()
+        outbox.process()
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=other).exists()
+        )
+
+    def test_rollback_discards_event(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                Post.objects.create(author=self.author, text='Пост')
+                raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_views_write_event_atomically(self):
+        """Если событие не записалось, запрос не сохраняет и объект"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        other = User.objects.create_user(username='other')
+        client = Client()
+        client.force_login(self.reader)
+        for url, data, model in (
+            (reverse('posts:post_create'), {'text': 'Новый'}, Post),
+            (reverse('posts:add_comment', args=[post.pk]),
+             {'text': 'Комментарий'}, Comment),
+            (reverse('posts:profile_follow', args=['other']), {}, Follow),
+        ):
+            with self.subTest(url=url):
+                before = model.objects.count()
+                with mock.patch.object(
+                    OutboxEvent.objects, 'create',
+                    side_effect=DatabaseError('сбой'),
+                ), self.assertRaises(DatabaseError):
+                    client.post(url, data)
+                self.assertEqual(model.objects.count(), before)
+        self.assertFalse(Follow.objects.filter(author=other).exists())
+
+    def test_failed_event_retried(self):
+        """Упавшее событие остаётся в очереди до предела попыток"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        with mock.patch(
+            'posts.timeline.fan_out', side_effect=RuntimeError('сбой')
+        ):
+            for _ in range(OUTBOX_MAX_ATTEMPTS):
+                self.assertEqual(outbox.process(), (1, 0))
+            self.assertEqual(outbox.process(), (0, 0))
+        event = OutboxEvent.objects.get(object_id=post.pk)
+        self.assertEqual(event.status, OutboxEvent.FAILED)
+        self.assertEqual(event.attempts, OUTBOX_MAX_ATTEMPTS)
+        self.assertIn('сбой', event.error)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(POSTS_DIGEST_INTERVAL=60 * 60)
+    def test_digest_interval(self):
+        """Уведомления копятся до срока дайджеста и уходят одним письмом"""
+        Post.objects.create(author=self.author, text='Первый')
+        outbox.process()
+        self.assertEqual(notifications.send_digests(), 0)
+        Post.objects.create(author=self.author, text='Второй')
+        outbox.process()
+        later = timezone.now() + datetime.timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(notifications.send_digests(), 1)
+        [message] = self.mailbox('reader@yatube.test')
+        self.assertIn('Первый', message.body)
+        self.assertIn('Второй', message.body)
+
+    def test_batch_size(self):
+        for i in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        out = StringIO()
+        call_command('process_outbox', batch_size=2, stdout=out)
+        self.assertIn('2/2', out.getvalue())
+        self.assertIn('1 дайджестов', out.getvalue())
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    @override_settings(POSTS_OUTBOX_EAGER=True)
+    def test_eager(self):
+        """Без воркера событие обрабатывается сразу"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertTrue(
+            Notification.objects.filter(user=self.reader).exists()
+        )
@@ -0,0 +1,59 @@
+from mixer.backend.django import mixer
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import SHOW_THREE_POSTS, SHOW_TEN_POSTS
+from ..models import Comment, Follow, Group, Post, User
+
+
+@override_settings(POSTS_OUTBOX_EAGER=True)
+class FeedQueryCountTest(TestCase):
+    """Число запросов на страницу не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = mixer.blend(Group)
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.user, author=cls.user)
+        # Включая запрос валидаторов ETag/Last-Modified (conditional.py).
+        # Профиль считает ещё и архивные посты автора (archive.py).
+        cls.PAGES = (
+            (reverse('posts:index'), 5),
+            (reverse('posts:group_list', args=[cls.group.slug]), 6),
+            (reverse('posts:profile', args=[cls.user.username]), 8),
+            (reverse('posts:post_detail', args=[cls.post.pk]), 5),
+            (reverse('posts:follow_index'), 4),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.auth = Client()
+        self.auth.force_login(FeedQueryCountTest.user)
+
+    def add_content(self, count):
+        for _ in range(count):
+            author = mixer.blend(User)
+            Follow.objects.create(user=self.user, author=author)
+            Post.objects.create(author=author, text='Пост', group=self.group)
+            Comment.objects.create(post=self.post, author=author, text='К')
+
+    def assert_page_queries(self):
+        for url, queries in self.PAGES:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    self.auth.get(url)
+
+    def test_query_count_is_constant(self):
+        """Запросы страниц не растут вместе с числом постов"""
+        self.add_content(SHOW_THREE_POSTS)
+        self.assert_page_queries()
+        self.add_content(SHOW_TEN_POSTS)
+        self.assert_page_queries()
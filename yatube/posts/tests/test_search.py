@@ -0,0 +1,70 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..search import SearchPaginator
+from ..stemmer import stem, stem_text
+
+
+class StemmerTest(TestCase):
+    def test_stem(self):
+        """Словоформы приводятся к одной основе"""
+        self.assertEqual(stem('красивые'), stem('красивый'))
+        self.assertEqual(stem('котами'), stem('кот'))
+        self.assertEqual(stem_text('Длинные ПОСТЫ'), 'длин пост')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.both = Post.objects.create(
+            author=cls.author, group=cls.group,
+            text='Кот и кошка. Коты любят котов, коту нужна кошка.',
+        )
+        cls.one = Post.objects.create(
+            author=cls.other, text='Про кота и собак'
+        )
+        cls.none = Post.objects.create(author=cls.other, text='Про собак')
+
+    def setUp(self):
+        self.client = Client()
+
+    def results(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        return list(response.context['page_obj'])
+
+    def test_ranked_results(self):
+        """Находятся все словоформы, релевантный пост идёт первым"""
+        self.assertEqual(self.results(q='коты'), [self.both, self.one])
+
+    def test_filters(self):
+        """Выдачу можно ограничить группой и автором"""
+        self.assertEqual(self.results(q='кот', group='group'), [self.both])
+        self.assertEqual(self.results(q='кот', author='other'), [self.one])
+
+    def test_empty_query(self):
+        """Без запроса выдачи нет"""
+        response = self.client.get(reverse('posts:search'))
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_cursor_pages(self):
+        """Курсор следующей страницы продолжает выдачу"""
+        first = SearchPaginator('кот', 1).get_page(None)
+        self.assertEqual(list(first), [self.both])
+        second = SearchPaginator('кот', 1).get_page(first.next_cursor)
+        self.assertEqual(list(second), [self.one])
+        self.assertFalse(second.has_next())
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        self.none.text = 'Про собак и котиков'
+        self.none.save()
+        self.assertIn(self.none, self.results(q='котик'))
+        self.none.delete()
+        self.assertEqual(self.results(q='собак'), [self.one])
@@ -0,0 +1,104 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import seeding, timeline
+from ..models import Follow, Group, Post, TimelineEntry, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedDataTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        options = {
+            'users': 30, 'groups': 2, 'posts': 200, 'comments': 20,
+            'follows': 50, 'stdout': StringIO(), **options,
+        }
+        call_command('seed_data', **options)
+
+    def test_zipf_weights(self):
+        """Веса степенного распределения убывают по рангу"""
+        weights = seeding.zipf_weights(3, 1.0)
+        self.assertEqual(weights, [1.0, 1.5, 1.5 + 1 / 3])
+        self.assertEqual(seeding.zipf_weights(3, 0), [1.0, 2.0, 3.0])
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'author__username', 'group__slug', 'text', 'pub_date'
+            )),
+            list(Follow.objects.order_by('pk').values_list(
+                'user__username', 'author__username'
+            )),
+        )
+
+    def test_seed_is_deterministic(self):
+        """Одинаковое зерно даёт одинаковые данные"""
+        self.seed(seed=7)
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        with mock.patch(
+            'django.utils.timezone.now',
+            return_value=timezone.now() + datetime.timedelta(days=3),
+        ):
+            self.seed(seed=7)
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(len(first[0]), 200)
+        self.assertEqual(len(first[1]), 50)
+
+    def test_names_after_deletion(self):
+        """Новые имена продолжают наибольший номер, а не число строк"""
+        self.seed(users=3, groups=3, posts=0, comments=0, follows=0)
+        User.objects.filter(username='user0').delete()
+        Group.objects.filter(slug='group-0').delete()
+        self.seed(users=2, groups=2, posts=0, comments=0, follows=0)
+        self.assertEqual(
+            sorted(User.objects.values_list('username', flat=True)),
+            ['user1', 'user2', 'user3', 'user4'],
+        )
+        self.assertEqual(
+            sorted(Group.objects.values_list('slug', flat=True)),
+            ['group-1', 'group-2', 'group-3', 'group-4'],
+        )
+
+    def test_timelines_match_rebuild(self):
+        """Ленты из генератора совпадают с timeline.rebuild()"""
+        self.seed(comments=0, follows=100)
+        seeded = set(TimelineEntry.objects.values_list('user', 'post'))
+        self.assertTrue(seeded)
+        timeline.rebuild(list(User.objects.values_list('pk', flat=True)))
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user', 'post')), seeded
+        )
+
+    def test_skewed_authors(self):
+        """С большим показателем степени первый автор пишет больше всех"""
+        self.seed(author_exponent=2.0, follows=0, comments=0)
+        counts = Post.objects.values('author').order_by('author')
+        top = Post.objects.filter(author=counts[0]['author']).count()
+        self.assertGreater(top, Post.objects.count() / 2)
+
+    def test_images(self):
+        """Часть постов получает картинки"""
+        self.seed(images=0.5, comments=0, follows=0)
+        with_images = Post.objects.exclude(image='').count()
+        self.assertTrue(0 < with_images < 200)
+
+    def test_invalid_images_ratio(self):
+        """Доля постов с картинками проверяется"""
+        with self.assertRaises(CommandError):
+            self.seed(images=2)
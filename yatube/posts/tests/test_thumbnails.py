@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from .. import thumbnails
+from ..constants import THUMBNAIL_MAX_ATTEMPTS
+from ..models import Post, ThumbnailJob, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+PICTURE = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailJobTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, content=PICTURE):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                'picture.gif', content, content_type='image/gif'
+            ),
+        })
+        return Post.objects.get(author=self.user)
+
+    def thumbnail_files(self):
+        return [
+            name
+            for _, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+            for name in files
+        ]
+
+    def test_post_create_enqueues_job(self):
+        """Пост с картинкой ставит задачу миниатюр в очередь"""
+        post = self.create_post()
+        self.assertEqual(post.thumbnail_job.status, ThumbnailJob.PENDING)
+
+    def test_post_without_image(self):
+        """Пост без картинки задачу не создаёт"""
+        self.client.post(reverse('posts:post_create'), {'text': 'Текст'})
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def test_process_generates_thumbnails(self):
+        """Задача создаёт миниатюры и помечается выполненной"""
+        name = 'yatube_thumbnail_generation_seconds_count'
+        generated = REGISTRY.get_sample_value(name)
+        post = self.create_post()
+        call_command('process_thumbnails', stdout=StringIO())
+        post.thumbnail_job.refresh_from_db()
+        self.assertEqual(post.thumbnail_job.status, ThumbnailJob.DONE)
+        self.assertTrue(self.thumbnail_files())
+        self.assertEqual(REGISTRY.get_sample_value(name), generated + 1)
+
+    def test_process_retries_then_fails(self):
+        """Ошибка возвращает задачу в очередь до предела попыток"""
+        post = self.create_post()
+        with override_settings(POSTS_THUMBNAILS=[('bad', {})]):
+            for _ in range(THUMBNAIL_MAX_ATTEMPTS):
+                thumbnails.process(post.thumbnail_job.pk)
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.status, ThumbnailJob.FAILED)
+        self.assertEqual(job.attempts, THUMBNAIL_MAX_ATTEMPTS)
+        self.assertTrue(job.error)
+
+    def test_claimed_job_is_skipped(self):
+        """Задачу, взятую другим воркером, повторно не выполняют"""
+        post = self.create_post()
+        self.assertTrue(thumbnails.claim(post.thumbnail_job.pk))
+        self.assertFalse(thumbnails.process(post.thumbnail_job.pk))
+
+    def test_warm_command(self):
+        """warm_thumbnails создаёт миниатюры для существующих постов"""
+        self.create_post()
+        out = StringIO()
+        call_command('warm_thumbnails', processes=1, stdout=out)
+        self.assertIn('1/1', out.getvalue())
+        self.assertTrue(self.thumbnail_files())
+
+    def test_warm_logs_broken_image(self):
+        """Ошибка хранилища пишется в журнал и не прерывает прогрев"""
+        post = self.create_post()
+        with mock.patch.object(
+            thumbnails, 'generate', side_effect=OSError('Хранилище')
+        ), self.assertLogs('yatube.thumbnails', 'ERROR') as logs:
+            self.assertEqual(thumbnails.warm([post.pk]), 0)
+        self.assertIn(f'поста {post.pk}', logs.output[0])
+
+    def test_warm_raises_unexpected_errors(self):
+        post = self.create_post()
+        with mock.patch.object(
+            thumbnails, 'generate', side_effect=KeyError('bug')
+        ), self.assertRaises(KeyError):
+            thumbnails.warm([post.pk])
@@ -0,0 +1,69 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry, User
+
+
+@override_settings(POSTS_OUTBOX_EAGER=True)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def feed(self):
+        return list(timeline.follow_feed(self.reader))
+
+    def test_new_post_in_follower_timeline(self):
+        """Новый пост автора попадает в ленту подписчика"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, self.feed())
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка заполняет ленту, отписка её очищает"""
+        other = User.objects.create_user(username='other')
+        post = Post.objects.create(author=other, text='Старый пост')
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertIn(post, self.feed())
+        Follow.objects.filter(user=self.reader, author=other).delete()
+        self.assertNotIn(post, self.feed())
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=other).exists()
+        )
+
+    @mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 0)
+    def test_heavy_author_read_on_demand(self):
+        """Посты популярного автора читаются без раскладки по лентам"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertIn(post, self.feed())
+
+    @mock.patch('posts.timeline.TIMELINE_LENGTH', 2)
+    def test_timeline_is_bounded(self):
+        """Длина ленты ограничена"""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(4)
+        ]
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list('post', flat=True)),
+            {posts[-1].pk, posts[-2].pk}
+        )
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines восстанавливает ленты"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertIn(post, self.feed())
@@ -0,0 +1,106 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from prometheus_client import REGISTRY
+
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, image_format='PNG', mode='1'):
+    content = BytesIO()
+    Image.new(mode, size).save(content, image_format)
+    return content.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='picture.png'):
+        return self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def test_valid_image(self):
+        """Картинка в пределах ограничений сохраняется"""
+        response = self.upload(make_image((20, 10)))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        post = Post.objects.get()
+        self.assertEqual((post.image.width, post.image.height), (20, 10))
+
+    def test_too_many_pixels(self):
+        """Картинку с огромным числом пикселей отклоняют по заголовку"""
+        response = self.upload(make_image((6000, 6000)))
+        self.assertIn('пикселей', response.context['form'].errors['image'][0])
+        self.assertFalse(Post.objects.exists())
+
+    def test_too_large_file(self):
+        """Файл больше лимита отклоняется во время загрузки"""
+        with mock.patch('posts.uploads.IMAGE_MAX_SIZE', 100):
+            response = self.upload(make_image((200, 200), mode='RGB'))
+        self.assertIn(
+            'Файл больше', response.context['form'].errors['image'][0]
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_not_an_image(self):
+        """Файл, который не является картинкой, отклоняется"""
+        response = self.upload(b'not an image', name='picture.png')
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_unsupported_format(self):
+        """Форматы вне списка разрешённых отклоняются"""
+        response = self.upload(make_image((10, 10), 'BMP'), 'picture.bmp')
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_metrics(self):
+        """Размер принятых картинок и число отклонённых попадают в
+        метрики"""
+        def count(name):
+            return REGISTRY.get_sample_value(name) or 0
+
+        accepted = count('yatube_upload_size_bytes_count')
+        rejected = count('yatube_uploads_rejected_total')
+        self.upload(make_image((20, 10)))
+        self.upload(b'not an image')
+        self.assertEqual(
+            count('yatube_upload_size_bytes_count'), accepted + 1
+        )
+        self.assertEqual(
+            count('yatube_uploads_rejected_total'), rejected + 1
+        )
+
+    def test_csrf_is_checked(self):
+        """CSRF по-прежнему проверяется"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Пост'}
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
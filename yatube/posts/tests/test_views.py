@@ -1,6 +1,6 @@
 from mixer.backend.django import mixer
 from django.core.cache import cache
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
 
@@ -205,15 +205,36 @@ class PostViewsTest(TestCase):
         """Проверка кэша для index."""
         response = self.anon.get(reverse('posts:index'))
         posts = response.content
-        Post.objects.get(id=self.post.id).delete()
+        Post.objects.filter(id=self.post.id).update(text='Без сигналов')
         response_old = self.anon.get(reverse('posts:index'))
         old_posts = response_old.content
         self.assertEqual(old_posts, posts)
-        cache.clear()
+        Post.objects.get(id=self.post.id).delete()
         response_new = self.anon.get(reverse('posts:index'))
         new_posts = response_new.content
         self.assertNotEqual(old_posts, new_posts)
+        self.assertNotIn(self.post.text, new_posts.decode())
 
+    def test_cache_invalidated_by_new_post(self):
+        """Новый пост сразу виден в закэшированных лентах."""
+        urls = (
+            reverse(self.INDEX_URL[0]),
+            reverse(self.GROUP_URL[0], args=self.GROUP_URL[2]),
+            reverse(self.PROFILE_URL[0], args=self.PROFILE_URL[2]),
+        )
+        for url in urls:
+            self.anon.get(url)
+        Post.objects.create(
+            author=self.user,
+            text='Свежий пост',
+            group=self.group,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.anon.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    @override_settings(POSTS_OUTBOX_EAGER=True)
     def test_follow_and_new_post_in_follow(self):
         """Подписка на пользователя и появление нового поста в подписке"""
         Follow.objects.all().delete()
@@ -287,3 +308,59 @@ class PaginatorViewsTest(TestCase):
             'posts:profile', args=[self.user.username]) + '?page=2'
         )
         self.assertEqual(len(response.context['page_obj']), SHOW_THREE_POSTS)
+
+
+@override_settings(CURSOR_PAGINATION_VIEWS=[
+    'posts:index', 'posts:group_list', 'posts:profile',
+])
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = mixer.blend(Group)
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user,
+                text=f'Тестовый пост {i}',
+                group=cls.group
+            ) for i in range(SHOW_TEN_POSTS + SHOW_THREE_POSTS)
+        ])
+        cls.URLS = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.user.username]),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages(self):
+        """Курсоры ведут на следующую и предыдущую страницы"""
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        for url in self.URLS:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(list(first), expected[:SHOW_TEN_POSTS])
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    url, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(second), expected[SHOW_TEN_POSTS:])
+                self.assertFalse(second.has_next())
+                previous = self.client.get(
+                    url, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(previous), list(first))
+                self.assertFalse(previous.has_previous())
+
+    def test_invalid_cursor(self):
+        """Испорченный курсор открывает первую страницу"""
+        for cursor in ('garbage', 'W10', '!!!'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index'), {'cursor': cursor}
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']), SHOW_TEN_POSTS
+                )
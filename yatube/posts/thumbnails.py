@@ -0,0 +1,137 @@
+"""Фоновая генерация миниатюр картинок постов.
+
+Очередь задач хранится в таблице ThumbnailJob, поэтому переживает
+перезапуск процесса. После сохранения поста с новой картинкой задача
+ставится в очередь, а после коммита транзакции передаётся пулу потоков
+процесса. Задачи, которые пул не успел выполнить, добирает команда
+process_thumbnails. Размеры миниатюр задаёт settings.POSTS_THUMBNAILS.
+"""
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from .constants import THUMBNAIL_MAX_ATTEMPTS
+from .metrics import THUMBNAIL_DURATION
+from .models import Post, ThumbnailJob
+
+RUNNING_TIMEOUT = datetime.timedelta(minutes=10)
+# Ошибки одной картинки: файла нет в хранилище, он битый или слишком
+# большой. Остальные исключения — ошибки кода, их не глушим.
+IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+logger = logging.getLogger('yatube.thumbnails')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def generate(image):
+    """Создаёт все настроенные миниатюры картинки."""
+    with THUMBNAIL_DURATION.time():
+        for geometry, options in settings.POSTS_THUMBNAILS:
+            get_thumbnail(image, geometry, **options)
+
+
+def enqueue(post):
+    """Ставит пост в очередь; пул получит задачу после коммита."""
+    job, _ = ThumbnailJob.objects.update_or_create(
+        post=post,
+        defaults={'status': ThumbnailJob.PENDING, 'attempts': 0, 'error': ''}
+    )
+    if settings.POSTS_THUMBNAIL_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_thread, job.pk)
+        )
+    return job
+
+
+def run_in_thread(job_id):
+    close_old_connections()
+    try:
+        process(job_id)
+    finally:
+        close_old_connections()
+
+
+def claim(job_id):
+    """Забирает задачу из очереди; False, если её уже взял другой."""
+    return bool(ThumbnailJob.objects.filter(
+        pk=job_id, status=ThumbnailJob.PENDING
+    ).update(
+        status=ThumbnailJob.RUNNING,
+        attempts=F('attempts') + 1,
+        updated=timezone.now(),
+    ))
+
+
+def process(job_id):
+    """Выполняет задачу. Неудачная возвращается в очередь до
+    THUMBNAIL_MAX_ATTEMPTS попыток."""
+    if not claim(job_id):
+        return False
+    job = ThumbnailJob.objects.select_related('post').get(pk=job_id)
+    try:
+        if job.post.image:
+            generate(job.post.image)
+    except Exception as error:
+        failed = job.attempts >= THUMBNAIL_MAX_ATTEMPTS
+        ThumbnailJob.objects.filter(pk=job_id).update(
+            status=ThumbnailJob.FAILED if failed else ThumbnailJob.PENDING,
+            error=repr(error),
+            updated=timezone.now(),
+        )
+        return False
+    ThumbnailJob.objects.filter(pk=job_id).update(
+        status=ThumbnailJob.DONE, error='', updated=timezone.now()
+    )
+    return True
+
+
+def requeue_stuck():
+    """Возвращает в очередь задачи, зависшие в RUNNING после падения."""
+    return ThumbnailJob.objects.filter(
+        status=ThumbnailJob.RUNNING,
+        updated__lt=timezone.now() - RUNNING_TIMEOUT,
+    ).update(status=ThumbnailJob.PENDING)
+
+
+def pending_jobs(limit):
+    return list(ThumbnailJob.objects.filter(
+        status=ThumbnailJob.PENDING
+    ).order_by('updated').values_list('pk', flat=True)[:limit])
+
+
+def warm(post_ids):
+    """Создаёт миниатюры для пачки постов; выполняется в дочернем
+    процессе команды warm_thumbnails."""
+    warmed = 0
+    posts = Post.objects.filter(pk__in=post_ids).exclude(image='')
+    for post in posts.only('image'):
+        try:
+            generate(post.image)
+        except IMAGE_ERRORS:
+            logger.exception(
+                'Не удалось создать миниатюры поста %s', post.pk
+            )
+            continue
+        warmed += 1
+    return warmed
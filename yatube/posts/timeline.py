@@ -0,0 +1,113 @@
+"""Материализованные ленты подписок.
+
+Новый пост автора раскладывается в ленты его подписчиков (fan-out on
+write). Посты авторов, у которых подписчиков больше
+FANOUT_FOLLOWERS_LIMIT, не раскладываются, а подмешиваются в ленту при
+чтении (fan-out on read). Длина каждой ленты ограничена TIMELINE_LENGTH.
+"""
+from django.db.models import OuterRef, Q, Subquery
+
+from .constants import (
+    FANOUT_FOLLOWERS_LIMIT,
+    TIMELINE_BATCH_SIZE,
+    TIMELINE_LENGTH,
+)
+from .models import Follow, Post, Profile, TimelineEntry
+
+
+def heavy_authors():
+    """Авторы, чьи посты читаются в обход материализованных лент."""
+    return Profile.objects.filter(
+        followers_count__gt=FANOUT_FOLLOWERS_LIMIT
+    ).values('user')
+
+
+def is_heavy_author(author_id):
+    return heavy_authors().filter(user_id=author_id).exists()
+
+
+def follow_feed(user):
+    followed = user.follower.values('author')
+    heavy = heavy_authors().filter(user__in=followed)
+    timeline = TimelineEntry.objects.filter(user=user).values('post')
+    return Post.objects.filter(Q(pk__in=timeline) | Q(author__in=heavy))
+
+
+def fan_out(post):
+    """Раскладывает пост по лентам; возвращает подписчиков, чьи ленты
+    изменились."""
+    if is_heavy_author(post.author_id):
+        return []
+    followers = list(
+        Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user', flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim(followers)
+    return followers
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты нового автора из подписок."""
+    if is_heavy_author(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim([user_id])
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+def trim(user_ids):
+    """Обрезает ленты до TIMELINE_LENGTH записей одним запросом."""
+    cutoff = TimelineEntry.objects.filter(
+        user=OuterRef('user')
+    ).order_by('-pub_date').values('pub_date')[
+        TIMELINE_LENGTH - 1:TIMELINE_LENGTH
+    ]
+    TimelineEntry.objects.filter(
+        user__in=user_ids,
+        pub_date__lt=Subquery(cutoff)
+    ).delete()
+
+
+def rebuild(user_ids):
+    """Пересобирает ленты пользователей по Follow и Post."""
+    heavy = set(heavy_authors().values_list('user', flat=True))
+    TimelineEntry.objects.filter(user__in=user_ids).delete()
+    for user_id in user_ids:
+        authors = Follow.objects.filter(user_id=user_id).exclude(
+            author__in=heavy
+        ).values('author')
+        posts = Post.objects.filter(author__in=authors).values_list(
+            'pk', 'pub_date'
+        )[:TIMELINE_LENGTH]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for pk, pub_date in posts
+            ],
+            batch_size=TIMELINE_BATCH_SIZE,
+        )
@@ -1,10 +1,185 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
 
-from .constants import SHOW_TEN_POSTS
+from .constants import CURSOR_NEXT, CURSOR_PREVIOUS, SHOW_TEN_POSTS
 
 
 def get_paginator(query, request):
+    if uses_cursor_pagination(request):
+        paginator = CursorPaginator(query, SHOW_TEN_POSTS)
+        return paginator.get_page(request.GET.get('cursor'))
     paginator = Paginator(query, SHOW_TEN_POSTS)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def uses_cursor_pagination(request):
+    match = request.resolver_match
+    return (
+        match is not None
+        and match.view_name in settings.CURSOR_PAGINATION_VIEWS
+    )
+
+
+class CursorPage:
+    """Страница курсорной пагинации: без номера и общего числа записей."""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __contains__(self, item):
+        return item in self.object_list
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу сортировки вместо OFFSET и COUNT(*).
+
+    Страница выбирается условием «строго после/до ключа» по полям
+    ordering, поэтому время выборки не зависит от глубины страницы.
+    Курсор — непрозрачная строка с направлением и значениями ключа.
+    """
+    is_cursor = True
+
+    def __init__(self, queryset, per_page, ordering=('-pub_date', '-pk')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def get_page(self, cursor):
+        direction, values = self.decode_cursor(cursor)
+        if values is None:
+            rows = self.fetch(None)
+            return self._page(rows, has_next=self._has_more(rows))
+        if direction == CURSOR_NEXT:
+            rows = self.fetch(values)
+            return self._page(
+                rows, has_next=self._has_more(rows), has_previous=True
+            )
+        rows = self.fetch(values, backwards=True)
+        if not rows:
+            return self.get_page(None)
+        has_previous = self._has_more(rows)
+        rows = rows[:self.per_page][::-1]
+        return self._page(rows, has_next=True, has_previous=has_previous)
+
+    def fetch(self, values, backwards=False):
+        """per_page + 1 объектов после ключа values (или до него)."""
+        ordering = self.ordering
+        if backwards:
+            ordering = [self._reverse(name) for name in ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, backwards))
+        return list(queryset[:self.per_page + 1])
+
+    def cursor_values(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def parse_values(self, raw_values):
+        if len(raw_values) != len(self.fields):
+            raise ValueError
+        return [
+            self._field(name).to_python(value)
+            for name, value in zip(self.fields, raw_values)
+        ]
+
+    def encode_cursor(self, direction, obj):
+        data = json.dumps(
+            [direction, self.cursor_values(obj)], default=self._serialize
+        )
+        token = base64.urlsafe_b64encode(data.encode())
+        return token.decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return CURSOR_NEXT, None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw_values = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+                raise ValueError
+            values = self.parse_values(raw_values)
+        except (
+            binascii.Error, TypeError, UnicodeDecodeError,
+            ValueError, ValidationError,
+        ):
+            return CURSOR_NEXT, None
+        return direction, values
+
+    def _field(self, name):
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    def _has_more(self, rows):
+        return len(rows) > self.per_page
+
+    def _beyond(self, values, backwards=False):
+        """Условие «после ключа» в порядке сортировки (или «до» него)."""
+        condition = Q()
+        for position in reversed(range(len(self.fields))):
+            name = self.ordering[position]
+            descending = name.startswith('-') != backwards
+            lookup = 'lt' if descending else 'gt'
+            field = self.fields[position]
+            strict = Q(**{f'{field}__{lookup}': values[position]})
+            if position == len(self.fields) - 1:
+                condition = strict
+            else:
+                condition = strict | (
+                    Q(**{field: values[position]}) & condition
+                )
+        return condition
+
+    def _page(self, rows, has_next=False, has_previous=False):
+        object_list = rows[:self.per_page]
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self.encode_cursor(CURSOR_NEXT, object_list[-1])
+        if object_list and has_previous:
+            previous_cursor = self.encode_cursor(
+                CURSOR_PREVIOUS, object_list[0]
+            )
+        return CursorPage(object_list, self, next_cursor, previous_cursor)
+
+    @staticmethod
+    def _serialize(value):
+        # DjangoJSONEncoder обрезает микросекунды, а ключ должен быть точным.
+        return value.isoformat()
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
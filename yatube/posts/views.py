@@ -1,49 +1,74 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
-from .constants import TWENTY_SECONDS
-from .forms import CommentForm, PostForm
+from core.db.routers import replica_reads
+
+from . import archive, cache, thumbnails
+from .conditional import (conditional, group_validators, index_validators,
+                          post_validators, profile_validators)
+from .constants import FIVE_MINUTES, ONE_DAY, SHOW_TEN_POSTS
+from .counters import get_profile
+from .forms import CommentForm, PostForm, SearchForm
 from .models import Follow, Group, Post, User
+from .search import SearchPaginator
+from .timeline import follow_feed
+from .uploads import image_upload
 from .utils import get_paginator
 
 
-@cache_page(TWENTY_SECONDS, key_prefix='index_page')
+@replica_reads
+@conditional(index_validators, vary_on_user=True)
+@cache.cached_page(FIVE_MINUTES, ONE_DAY, (cache.FEED,))
 def index(request):
-    post_list = Post.objects.select_related('group')
-    return render(
-        request,
-        'posts/index.html',
-        {'page_obj': get_paginator(post_list, request)}
-    )
+    post_list = Post.objects.for_feed()
+    context = {
+        'page_obj': get_paginator(post_list, request),
+        **cache.fragment_context(cache.FEED),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@conditional(group_validators, vary_on_user=True)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.for_feed()
     context = {
         'group': group,
         'page_obj': get_paginator(posts, request),
+        **cache.fragment_context(cache.group_scope(group.pk)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@conditional(profile_validators, vary_on_user=True)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    following = author.following.all().exists()
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
+    posts = archive.author_posts(author)
+    following = (
+        request.user.is_authenticated
+        and author.following.filter(user=request.user).exists()
+    )
     context = {
         'author': author,
-        'posts': posts,
+        'profile': get_profile(author),
         'page_obj': get_paginator(posts, request),
         'following': following,
+        **cache.fragment_context(cache.author_scope(author.pk)),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@conditional(post_validators, vary_on_user=True, vary_on_csrf=True)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    post_count = post.author.posts.count()
+    post = archive.get_post_or_404(post_id)
+    post_count = get_profile(post.author).posts_count
     form = CommentForm()
     comments = post.comments.all()
     context = {
@@ -55,22 +80,53 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid():
+        group = form.cleaned_data['group']
+        author = None
+        if form.cleaned_data['author']:
+            author = get_object_or_404(
+                User, username=form.cleaned_data['author']
+            )
+        paginator = SearchPaginator(
+            form.cleaned_data['q'],
+            SHOW_TEN_POSTS,
+            author_id=author and author.pk,
+            group_id=group and group.pk,
+        )
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@image_upload
 def post_create(request):
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None
+        files=request.FILES or None,
+        upload_errors=request.upload_errors
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        # Событие outbox пишется в той же транзакции, что и пост.
+        with transaction.atomic():
+            post.save()
+            if post.image:
+                thumbnails.enqueue(post)
         return redirect('posts:profile', request.user)
 
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@image_upload
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
 
@@ -79,12 +135,15 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        upload_errors=request.upload_errors
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image and 'image' in form.changed_data:
+            thumbnails.enqueue(post)
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -96,20 +155,21 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = Post.objects.get(pk=post_id)
+    post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    authors = request.user.follower.values_list('author', flat=True)
-    post_list = Post.objects.filter(author__in=authors)
+    post_list = follow_feed(request.user).for_feed()
     context = {
         'page_obj': get_paginator(post_list, request)
     }
@@ -120,10 +180,11 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author
-        )
+        with transaction.atomic():
+            Follow.objects.get_or_create(
+                user=request.user,
+                author=author
+            )
     return redirect("posts:follow_index")
 
 
@@ -0,0 +1,9 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# Ленты и страница поста под ASGI обслуживаются posts.async_views.
+os.environ.setdefault('POSTS_ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
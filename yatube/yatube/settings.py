@@ -1,10 +1,15 @@
 import os
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = 't$m5h7rslzhj-%30#q^=z@f*#unh0)gldo20t+%)bes)ah&%lj'
 
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
+
+# Запуск тестов: manage.py test или pytest.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 
 ALLOWED_HOSTS = [
     'www.vladyatube.pythonanywhere.com',
@@ -31,10 +36,11 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.middleware.InstrumentationMiddleware',
+    'core.db.middleware.PrimaryAfterWriteMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,15 +48,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# debug_toolbar замедляет каждый запрос и раскрывает внутренности
+# приложения, поэтому подключается только при отладке.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.templates.InstrumentedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,15 +77,75 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
 
 
+# База задаётся окружением. По умолчанию — SQLite в файле проекта; для
+# PostgreSQL с пулом соединений процесса:
+# DB_ENGINE=core.db.backends.postgresql_pool DB_NAME=yatube
+# POSTGRES_USER=... POSTGRES_PASSWORD=... DB_HOST=... DB_PORT=5432
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+DB_POOLED = DB_ENGINE == 'core.db.backends.postgresql_pool'
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': DB_ENGINE,
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.getenv('POSTGRES_USER', ''),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        # Соединение живёт между запросами столько секунд. С пулом оно
+        # возвращается в пул после каждого запроса.
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', 0 if DB_POOLED else 60)
+        ),
+        # Проверять постоянное соединение перед запросом (core.db).
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        # Пул core.db.backends.postgresql_pool. Когда соединения кончились,
+        # поток ждёт свободное до TIMEOUT секунд.
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
     }
 }
 
+# Реплики для чтения лент (core/db/routers.py): адреса через запятую,
+# для SQLite — пути к копиям файла базы.
+DB_REPLICAS = [
+    replica.strip()
+    for replica in os.getenv('DB_REPLICAS', '').split(',')
+    if replica.strip()
+]
+DATABASE_REPLICAS = []
+for number, replica in enumerate(DB_REPLICAS, 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME' if DB_ENGINE.endswith('sqlite3') else 'HOST': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+
+# Реплика, отстающая больше стольких секунд, не используется.
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+
+# Столько секунд после записи чтения пользователя идут в default.
+DATABASE_REPLICA_PIN = int(os.getenv('DB_REPLICA_PIN', 15))
+
+# PRAGMA для каждого нового соединения SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,20 +185,141 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь и отправляются командой send_queued_mail
+# через MAIL_QUEUE_BACKEND.
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'core.mail.queue.QueueBackend')
+MAIL_QUEUE_BACKEND = os.getenv(
+    'MAIL_QUEUE_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.getenv('SITE_URL', 'http://127.0.0.1:8000')
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Двухуровневый кэш: L1 в памяти процесса перед общим для всех воркеров
+# L2. В продакшене L2 — Redis или memcached, например
+# CACHE_BACKEND=django_redis.cache.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+# По умолчанию L2 — файловый кэш, общий для процессов одной машины.
+# LocMemCache у каждого процесса свой, и версии областей, поднятые в
+# одном воркере, не видели бы другие, поэтому он только для тестов.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.tiered.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 5)),
+            # Страницы cached_page читаются только из L2: иначе после
+            # изменения данных другие воркеры ещё L1_TIMEOUT секунд
+            # отдавали бы старую копию и пересчитывали её каждый сам.
+            'L2_ONLY_PREFIXES': ('posts:page:',),
+        },
+    },
+    'shared': {
+        'BACKEND': os.getenv('CACHE_BACKEND', (
+            'django.core.cache.backends.locmem.LocMemCache' if TESTING
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        )),
+        'LOCATION': os.getenv('CACHE_LOCATION', (
+            '' if TESTING
+            else os.path.join(tempfile.gettempdir(), 'yatube-cache')
+        )),
+    },
 }
 
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Имена представлений (например, 'posts:index'), в которых вместо
+# постраничной пагинации используется курсорная (?cursor=).
+CURSOR_PAGINATION_VIEWS = []
+
+# Асинхронные версии лент и страницы поста (posts.async_views). Их
+# включает yatube/asgi.py: под WSGI каждое асинхронное представление
+# выполнялось бы в отдельном цикле событий и только потеряло бы время.
+POSTS_ASYNC_VIEWS = os.getenv('POSTS_ASYNC_VIEWS', 'False') == 'True'
+# Выполнять независимые запросы асинхронного представления одновременно,
+# каждый в своём потоке и соединении с базой.
+POSTS_ASYNC_PARALLEL_QUERIES = os.getenv(
+    'POSTS_ASYNC_PARALLEL_QUERIES', 'True'
+) == 'True'
+
+# Путь к классу бэкенда поиска по постам. None — выбрать по базе данных.
+POSTS_SEARCH_BACKEND = None
+
+# Обрабатывать события outbox (ленты подписок, письма) сразу в запросе,
+# а не в воркере process_outbox. Только для разработки без воркера:
+# запрос тогда сам раскладывает пост по лентам и ставит письма.
+POSTS_OUTBOX_EAGER = os.getenv('POSTS_OUTBOX_EAGER', 'False') == 'True'
+# Не чаще одного письма с уведомлениями за столько секунд.
+POSTS_DIGEST_INTERVAL = int(os.getenv('POSTS_DIGEST_INTERVAL', 60 * 60))
+
+# Миниатюры, которые создаются в фоне после загрузки картинки поста:
+# (геометрия, параметры) — как в теге {% thumbnail %} шаблонов.
+POSTS_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Потоков в пуле процесса; 0 — задачи выполняет только process_thumbnails.
+POSTS_THUMBNAIL_WORKERS = int(os.getenv('POSTS_THUMBNAIL_WORKERS', 2))
+
+# Потоки процесса для массовых действий модераторов; 0 — только
+# команда process_moderation.
+POSTS_MODERATION_WORKERS = int(os.getenv('POSTS_MODERATION_WORKERS', 1))
+
+# Посты старше стольких дней команда archive_posts переносит в архив.
+POSTS_ARCHIVE_AFTER_DAYS = int(os.getenv('POSTS_ARCHIVE_AFTER_DAYS', 365))
+
+# Замеры запросов (core.instrumentation): доля запросов, у которых
+# считаются SQL, кэш и время шаблонов, порог медленного запроса в
+# миллисекундах и сколько самых долгих SQL-запросов писать в журнал.
+INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv('INSTRUMENTATION_SAMPLE_RATE', 0.05)
+)
+INSTRUMENTATION_SLOW_REQUEST_MS = float(
+    os.getenv('INSTRUMENTATION_SLOW_REQUEST_MS', 500)
+)
+INSTRUMENTATION_TOP_QUERIES = 5
+# Заголовок Server-Timing раскрывает время запросов к базе, поэтому по
+# умолчанию отдаётся только при отладке.
+INSTRUMENTATION_SERVER_TIMING = os.getenv(
+    'INSTRUMENTATION_SERVER_TIMING', str(DEBUG)
+) == 'True'
+
+# Пространства имён URL, по которым метрики различают представления;
+# остальные запросы попадают в метку 'other'.
+METRICS_VIEW_NAMESPACES = ('posts', 'users')
+# Кому отдаётся /metrics: адреса клиентов через запятую или запрос с
+# заголовком «Authorization: Bearer <METRICS_TOKEN>». Остальным — 404.
+METRICS_ALLOWED_IPS = [
+    address.strip()
+    for address in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+    if address.strip()
+]
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'yatube.thumbnails': {
+            'handlers': ['console'],
+            'level': 'ERROR',
+            'propagate': False,
+        },
+    },
+}